@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+PDF 추출 엔진 벤치마크
+- uploads/ 아래의 PDF(내용이 같은 파일은 한 번만)를 엔진별로 추출
+- 엔진별 pages/sec, 페이지당 글자 수, 한글 글자 수, 빈 페이지 비율 출력
+
+사용법:
+    python benchmark_pdf_engines.py [PDF 디렉토리] [--engines pypdf2,pdfium,pdfminer]
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+from pdf_engines import available_engines, get_engine
+from pdf_text_cache import file_sha256
+
+HANGUL_PATTERN = re.compile(r'[가-힣]')
+
+
+def collect_pdfs(directory: str):
+    """디렉토리의 PDF 목록 (SHA-256 기준 중복 제거)"""
+    seen = set()
+    pdf_paths = []
+    for path in sorted(glob.glob(os.path.join(directory, "**", "*.pdf"), recursive=True)):
+        content_hash = file_sha256(path)
+        if content_hash in seen:
+            continue
+        seen.add(content_hash)
+        pdf_paths.append(path)
+    return pdf_paths
+
+
+def benchmark_engine(engine_name: str, pdf_paths):
+    """한 엔진으로 모든 PDF를 추출하고 통계 반환"""
+    engine = get_engine(engine_name)
+    total_pages = 0
+    empty_pages = 0
+    total_chars = 0
+    hangul_chars = 0
+    failures = 0
+    elapsed = 0.0
+
+    for path in pdf_paths:
+        try:
+            with open(path, 'rb') as f:
+                start = time.perf_counter()
+                pages = engine.extract_pages(f)
+                elapsed += time.perf_counter() - start
+        except Exception as e:
+            failures += 1
+            print(f"  ❌ {engine_name}: {os.path.basename(path)} 추출 실패: {e}")
+            continue
+
+        total_pages += len(pages)
+        for text in pages:
+            stripped = text.strip()
+            if not stripped:
+                empty_pages += 1
+            total_chars += len(stripped)
+            hangul_chars += len(HANGUL_PATTERN.findall(stripped))
+
+    return {
+        "engine": engine_name,
+        "pages": total_pages,
+        "seconds": elapsed,
+        "pages_per_sec": total_pages / elapsed if elapsed > 0 else 0.0,
+        "chars_per_page": total_chars / total_pages if total_pages else 0.0,
+        "hangul_per_page": hangul_chars / total_pages if total_pages else 0.0,
+        "empty_ratio": empty_pages / total_pages if total_pages else 0.0,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 추출 엔진 벤치마크")
+    parser.add_argument("directory", nargs="?", default="uploads")
+    parser.add_argument("--engines", default=",".join(available_engines()))
+    args = parser.parse_args()
+
+    pdf_paths = collect_pdfs(args.directory)
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+
+    print("=" * 80)
+    print(f"📊 PDF 추출 엔진 벤치마크: {len(pdf_paths)}개 PDF ({args.directory})")
+    print(f"🔧 엔진: {', '.join(engines)}")
+    print("=" * 80)
+
+    results = []
+    for engine_name in engines:
+        try:
+            results.append(benchmark_engine(engine_name, pdf_paths))
+        except ValueError as e:
+            print(f"⚠️ {e}")
+
+    print(f"{'engine':<10} {'pages':>6} {'sec':>8} {'pages/s':>9} {'chars/p':>9} {'한글/p':>8} {'empty':>7} {'fail':>5}")
+    for r in results:
+        print(
+            f"{r['engine']:<10} {r['pages']:>6} {r['seconds']:>8.2f} {r['pages_per_sec']:>9.1f} "
+            f"{r['chars_per_page']:>9.1f} {r['hangul_per_page']:>8.1f} {r['empty_ratio']:>7.1%} {r['failures']:>5}"
+        )
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
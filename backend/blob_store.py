@@ -0,0 +1,125 @@
+# backend/blob_store.py
+import hashlib
+import os
+import uuid
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+import models
+from database import insert_ignore_conflict
+
+BLOB_DIR = os.path.join("uploads", "blobs")
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR", "upload_tmp")  # 정적 마운트(/uploads) 밖에 둠
+MAX_UPLOAD_SIZE = 500 * 1024 * 1024  # 500MB
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class UploadTooLargeError(Exception):
+    """업로드 크기 제한 초과"""
+
+
+class BlobStore:
+    """내용 주소 기반 PDF 원본 저장소 (SHA-256, 참조 카운트)
+
+    같은 내용의 PDF는 uploads/blobs/{hash[:2]}/{hash}-{id}.pdf 에 한 번만 저장되고,
+    PDFFile 행은 content_hash로 원본을 참조한다. PDFBlob.ref_count가 0이 되면
+    행과 파일을 함께 정리한다.
+    """
+
+    def __init__(self, blob_dir: str = BLOB_DIR, tmp_dir: str = UPLOAD_TMP_DIR):
+        self.blob_dir = blob_dir
+        self.tmp_dir = tmp_dir
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def blob_path(self, content_hash: str) -> str:
+        # 행마다 고유한 파일 경로: 지워지는 중인 이전 행의 파일과 새 행의 파일이 겹치지 않게 함
+        return os.path.join(self.blob_dir, content_hash[:2], f"{content_hash}-{uuid.uuid4().hex[:8]}.pdf")
+
+    def new_temp_path(self) -> str:
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4()}.part")
+
+    def discard_temp(self, tmp_path: Optional[str]) -> None:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    async def spool_upload(self, upload, max_size: int = MAX_UPLOAD_SIZE) -> Tuple[str, str, int]:
+        """업로드를 임시 파일로 스트리밍 저장하면서 SHA-256 계산
+
+        Returns:
+            (임시 파일 경로, content_hash, 파일 크기)
+        """
+        tmp_path = self.new_temp_path()
+        digest = hashlib.sha256()
+        file_size = 0
+        try:
+            with open(tmp_path, "wb") as buffer:
+                while chunk := await upload.read(CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        raise UploadTooLargeError()
+                    digest.update(chunk)
+                    buffer.write(chunk)
+        except BaseException:
+            self.discard_temp(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), file_size
+
+    def acquire(self, db: Session, tmp_path: str, content_hash: str, file_size: int) -> models.PDFBlob:
+        """임시 파일을 원본 저장소에 등록하고 참조 카운트 증가 (커밋은 호출자가 수행)"""
+        # 같은 새 내용을 동시에 처음 올려도 기본 키 충돌이 나지 않도록 먼저 행을 만든 뒤 잠금
+        blob_path = self.blob_path(content_hash)
+        created = insert_ignore_conflict(db, models.PDFBlob, {
+            "content_hash": content_hash,
+            "file_path": blob_path,
+            "file_size": file_size,
+            "ref_count": 0
+        })
+        blob = db.query(models.PDFBlob).filter(
+            models.PDFBlob.content_hash == content_hash
+        ).with_for_update().one()
+
+        # 재사용 여부는 파일 존재가 아니라 잠근 행으로 판단한다. 새 행은 고유 경로를 쓰므로
+        # 직전에 참조가 0이 된 행의 파일이 커밋 뒤 지워져도 새 원본에 영향이 없다.
+        if created or not os.path.exists(blob.file_path):
+            os.makedirs(os.path.dirname(blob.file_path), exist_ok=True)
+            os.replace(tmp_path, blob.file_path)
+        else:
+            # 이미 저장된 내용 → 새 업로드는 버림
+            self.discard_temp(tmp_path)
+            print(f"♻️ 중복 PDF 재사용: {content_hash[:12]}")
+
+        blob.ref_count = (blob.ref_count or 0) + 1
+        return blob
+
+    def release(self, db: Session, content_hash: str) -> Optional[str]:
+        """참조 카운트 감소, 0이 되면 행 삭제 후 지울 파일 경로 반환
+
+        파일은 커밋이 끝난 뒤 delete_files()로 지워야 롤백 시 원본을 잃지 않는다.
+        """
+        blob = db.query(models.PDFBlob).filter(
+            models.PDFBlob.content_hash == content_hash
+        ).with_for_update().first()
+        if blob is None:
+            return None
+
+        blob.ref_count = (blob.ref_count or 0) - 1
+        if blob.ref_count > 0:
+            return None
+
+        file_path = blob.file_path
+        db.delete(blob)
+        # 이 내용으로 만든 퀴즈 생성 캐시도 함께 정리
+        db.query(models.QuizGenerationCache).filter(
+            models.QuizGenerationCache.content_hash == content_hash
+        ).delete(synchronize_session=False)
+        return file_path
+
+    def delete_files(self, file_paths: List[Optional[str]]) -> None:
+        """참조가 없어진 원본 파일 삭제"""
+        for file_path in file_paths:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+                print(f"🗑️ 원본 PDF 정리: {file_path}")
+
+# 전역 인스턴스
+blob_store = BlobStore()
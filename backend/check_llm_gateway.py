@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+LLM 게이트웨이 스케줄링 점검
+- 우선순위 순서, IDLE 슬롯 제한, IDLE 대기 중 빈 슬롯 사용 여부를 시나리오로 확인
+- 실패하면 AssertionError로 종료
+
+사용법:
+    python check_llm_gateway.py
+"""
+import asyncio
+
+from llm_gateway import LLMGateway, Priority
+
+
+async def wait_started(task: asyncio.Task, started: list, label: str, timeout: float = 0.5) -> bool:
+    """task가 timeout 안에 슬롯을 받았는지"""
+    for _ in range(int(timeout / 0.01)):
+        if label in started:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+async def check_idle_waiter_does_not_block_free_slot():
+    """BATCH가 슬롯 1개 점유 + IDLE 대기 중일 때, INTERACTIVE는 남은 슬롯으로 바로 시작해야 함"""
+    gateway = LLMGateway(max_concurrency=2)
+    started = []
+    release_batch = asyncio.Event()
+
+    async def job(label: str, priority: Priority, hold: asyncio.Event = None):
+        async with gateway.slot(priority, label):
+            started.append(label)
+            if hold is not None:
+                await hold.wait()
+
+    batch = asyncio.create_task(job("batch", Priority.BATCH, release_batch))
+    assert await wait_started(batch, started, "batch")
+
+    # IDLE은 슬롯 1개를 남겨 둬야 하므로 대기
+    idle = asyncio.create_task(job("idle", Priority.IDLE))
+    await asyncio.sleep(0.05)
+    assert "idle" not in started, "IDLE이 예약 슬롯을 사용함"
+
+    interactive = asyncio.create_task(job("interactive", Priority.INTERACTIVE))
+    assert await wait_started(interactive, started, "interactive"), \
+        "빈 슬롯이 있는데 INTERACTIVE가 IDLE 뒤에서 대기함"
+
+    release_batch.set()
+    await asyncio.gather(batch, idle, interactive)
+    assert gateway._active == 0 and not gateway._queue
+    print("✅ IDLE 대기 중 빈 슬롯 사용")
+
+
+async def check_priority_order():
+    """슬롯이 풀리면 높은 우선순위부터 시작"""
+    gateway = LLMGateway(max_concurrency=1)
+    started = []
+    release = asyncio.Event()
+
+    async def job(label: str, priority: Priority, hold: asyncio.Event = None):
+        async with gateway.slot(priority, label):
+            started.append(label)
+            if hold is not None:
+                await hold.wait()
+
+    holder = asyncio.create_task(job("holder", Priority.BATCH, release))
+    await asyncio.sleep(0.01)
+    tasks = [
+        asyncio.create_task(job("idle", Priority.IDLE)),
+        asyncio.create_task(job("batch", Priority.BATCH)),
+        asyncio.create_task(job("interactive", Priority.INTERACTIVE)),
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    assert started == ["holder", "interactive", "batch", "idle"], started
+    print("✅ 우선순위 순서")
+
+
+async def main():
+    await check_idle_waiter_does_not_block_free_slot()
+    await check_priority_order()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
 import os
 from dotenv import load_dotenv
 
@@ -12,6 +13,17 @@ engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def insert_ignore_conflict(db, model, values: dict) -> bool:
+    """기본 키가 이미 있으면 아무것도 하지 않는 INSERT (INSERT ... ON CONFLICT DO NOTHING)
+
+    행이 없을 때 SELECT ... FOR UPDATE는 아무것도 잠그지 않으므로, 동시에 처음 저장하는
+    요청이 둘 다 INSERT하다 기본 키 충돌이 나지 않도록 먼저 이 함수로 행을 만든 뒤 잠근다.
+    새 행을 만들었으면 True를 반환한다.
+    """
+    dialect = sqlite if db.bind.dialect.name == "sqlite" else postgresql
+    result = db.execute(dialect.insert(model.__table__).values(**values).on_conflict_do_nothing())
+    return result.rowcount == 1
+
 def get_db():
     db = SessionLocal()
     try:
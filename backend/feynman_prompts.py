@@ -1,6 +1,10 @@
 # backend/feynman_prompts.py (새 파일)
+from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional
+from string import Template
+from typing import Callable, Dict, List, Optional, Tuple
+
+PROMPT_TEMPLATE_VERSION = "2"  # 템플릿 문구/순서를 바꾸면 올림
 
 class LearningPhase(Enum):
     """학습 단계 정의"""
@@ -15,6 +19,102 @@ class LearningPhase(Enum):
     EVALUATION = "evaluation"
     RETRY = "retry"
 
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (pdf_utils.select_representative_text와 같은 1 토큰 = 4자 기준)"""
+    return (len(text) + 3) // 4
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """단계별 프롬프트 템플릿
+
+    static: 요청마다 바뀌지 않는 지시문 (앞에 배치 → LLM 접두부 캐시 재사용)
+    dynamic: 개념/지식 수준 등 요청마다 바뀌는 슬롯 ($이름 형식, 맨 뒤에 배치)
+    slots: context → dynamic 슬롯 값
+    """
+    name: str
+    version: str
+    static: str
+    dynamic: Optional[Template] = None
+    slots: Optional[Callable[[Dict], Dict[str, str]]] = None
+    include_base: bool = True
+
+
+class PromptTemplateRegistry:
+    """버전별 프롬프트 템플릿 저장소
+
+    템플릿은 등록 시 한 번 컴파일하고, 정적 접두부(기본 프롬프트 + static)는
+    처음 렌더링할 때 토큰 수와 함께 캐시한다. 렌더링은 캐시된 접두부 뒤에
+    짧은 동적 부분만 붙이므로 프롬프트 길이와 상관없이 비용이 일정하다.
+    """
+
+    def __init__(self, base_prompt: str, version: str = PROMPT_TEMPLATE_VERSION):
+        self.base_prompt = base_prompt.strip()
+        self.version = version
+        self._templates: Dict[Tuple[str, str], PromptTemplate] = {}
+        self._prefixes: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        self._renders: Dict[str, int] = {}
+
+    def register(
+        self,
+        name: str,
+        static: str,
+        dynamic: Optional[str] = None,
+        slots: Optional[Callable[[Dict], Dict[str, str]]] = None,
+        include_base: bool = True,
+        version: Optional[str] = None
+    ) -> None:
+        version = version or self.version
+        self._templates[(name, version)] = PromptTemplate(
+            name=name,
+            version=version,
+            static=static.strip(),
+            dynamic=Template(dynamic.strip()) if dynamic else None,
+            slots=slots,
+            include_base=include_base
+        )
+        self._prefixes.pop((name, version), None)
+
+    def has(self, name: str, version: Optional[str] = None) -> bool:
+        return (name, version or self.version) in self._templates
+
+    def prefix(self, name: str, version: Optional[str] = None) -> Tuple[str, int]:
+        """캐시된 정적 접두부와 토큰 수"""
+        key = (name, version or self.version)
+        cached = self._prefixes.get(key)
+        if cached is None:
+            template = self._templates[key]
+            parts = [self.base_prompt, template.static] if template.include_base else [template.static]
+            text = "\n\n".join(part for part in parts if part)
+            cached = (text, estimate_tokens(text))
+            self._prefixes[key] = cached
+        return cached
+
+    def render(self, name: str, context: Dict, version: Optional[str] = None) -> str:
+        """정적 접두부 + 동적 슬롯"""
+        template = self._templates[(name, version or self.version)]
+        prefix, _ = self.prefix(name, template.version)
+        self._renders[name] = self._renders.get(name, 0) + 1
+        if template.dynamic is None:
+            return prefix
+        values = template.slots(context) if template.slots else {}
+        return f"{prefix}\n\n{template.dynamic.substitute(values)}"
+
+    def metrics(self) -> Dict:
+        """템플릿별 접두부 토큰 수와 렌더링 횟수"""
+        return {
+            "version": self.version,
+            "templates": {
+                name: {
+                    "prefix_tokens": self.prefix(name, version)[1],
+                    "renders": self._renders.get(name, 0),
+                }
+                for name, version in self._templates
+                if version == self.version
+            },
+        }
+
+
 class FeynmanPromptEngine:
     """파인만 학습법 프롬프트 관리"""
     
@@ -29,24 +129,34 @@ class FeynmanPromptEngine:
 3. 학생의 메타인지 능력 향상 지원
 4. 객관적이고 건설적인 피드백 제공
 """
+        self.templates = PromptTemplateRegistry(self.base_prompt)
+        self.templates.register("default", DEFAULT_STATIC)
+        self.templates.register(
+            LearningPhase.KNOWLEDGE_CHECK.value, KNOWLEDGE_CHECK_STATIC,
+            KNOWLEDGE_CHECK_DYNAMIC, self._knowledge_check_slots
+        )
+        self.templates.register(LearningPhase.FIRST_EXPLANATION.value, FIRST_EXPLANATION_STATIC)
+        self.templates.register(LearningPhase.SELF_REFLECTION_1.value, SELF_REFLECTION_1_STATIC)
+        self.templates.register(
+            LearningPhase.AI_EXPLANATION.value, AI_EXPLANATION_STATIC,
+            AI_EXPLANATION_DYNAMIC, self._ai_explanation_slots
+        )
+        self.templates.register(LearningPhase.SECOND_EXPLANATION.value, SECOND_EXPLANATION_STATIC)
+        self.templates.register(LearningPhase.SELF_REFLECTION_2.value, SELF_REFLECTION_2_STATIC)
+        self.templates.register(
+            LearningPhase.EVALUATION.value, EVALUATION_STATIC,
+            EVALUATION_DYNAMIC, self._evaluation_slots
+        )
+        self.templates.register(
+            "knowledge_level_judgment", KNOWLEDGE_LEVEL_JUDGMENT_STATIC,
+            KNOWLEDGE_LEVEL_JUDGMENT_DYNAMIC, self._knowledge_level_judgment_slots,
+            include_base=False
+        )
 
     def get_prompt_for_phase(self, phase: LearningPhase, context: Dict) -> str:
-        """단계별 프롬프트 반환"""
-
-        prompts = {
-            LearningPhase.KNOWLEDGE_CHECK: self._knowledge_check_prompt,
-            LearningPhase.FIRST_EXPLANATION: self._first_explanation_prompt,
-            LearningPhase.SELF_REFLECTION_1: self._self_reflection_1_prompt,
-            LearningPhase.AI_EXPLANATION: self._ai_explanation_prompt,
-            LearningPhase.SECOND_EXPLANATION: self._second_explanation_prompt,
-            LearningPhase.SELF_REFLECTION_2: self._self_reflection_2_prompt,
-            LearningPhase.EVALUATION: self._evaluation_prompt,
-        }
-
-        prompt_func = prompts.get(phase, self._default_prompt)
-        if prompt_func:
-            return self.base_prompt + "\n\n" + prompt_func(context)
-        return self.base_prompt
+        """단계별 프롬프트 반환 (정적 지시문 → 동적 슬롯 순서)"""
+        name = phase.value if self.templates.has(phase.value) else "default"
+        return self.templates.render(name, context)
 
     def get_knowledge_level_judgment_prompt(self, concept: str, user_explanation: str) -> str:
         """지식 수준 판단 프롬프트 반환 (별도 AI 호출용)"""
@@ -54,11 +164,7 @@ class FeynmanPromptEngine:
             'concept': concept,
             'user_explanation': user_explanation
         }
-        return self._knowledge_level_judgment_prompt(context)
-
-    def _default_prompt(self, context: Dict) -> str:
-        """기본 프롬프트"""
-        return "사용자의 질문에 파인만 학습법 원칙에 따라 답변하세요."
+        return self.templates.render("knowledge_level_judgment", context)
     
     def _home_prompt(self, context: Dict) -> str:
         """홈 단계"""
@@ -77,9 +183,9 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
 """
 
 
-    def _knowledge_check_prompt(self, context: Dict) -> str:
-        """지식 수준 확인 단계"""
-        concept = context.get('concept', '')
+    def _knowledge_check_slots(self, context: Dict) -> Dict[str, str]:
+        """지식 수준 확인 단계 슬롯"""
+        concept = context.get('concept', '') or ''
         original_question = context.get('original_question', '')
 
         # 원본 질문이 있으면 맥락 정보 추가
@@ -87,113 +193,18 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
         if original_question and original_question != concept:
             context_info = f"\n(원본 질문: \"{original_question}\")"
 
-        return f"""
-사용자가 "{concept}"에 대해 질문했습니다.{context_info}
-사용자의 지식 수준을 파악하기 위한 단계입니다.
-
-응답 형식:
-- 친근하고 격려하는 톤 사용
-- 사용자가 '알고 있다'를 선택하면 설명 준비 안내
-- '모른다'를 선택하면 기초부터 차근차근 설명 준비
-"""
+        return {"concept": concept, "context_info": context_info}
 
-    def _first_explanation_prompt(self, context: Dict) -> str:
-        """첫 번째 설명 분석"""
-        return """
-사용자가 자신이 아는 만큼 개념을 설명했습니다.
-이제 사용자의 설명을 분석해야 합니다.
-
-분석 포인트:
-1. 정확한 이해 부분 확인
-2. 오개념이나 부족한 부분 파악
-3. 사용된 언어의 복잡도 평가
-4. 예시나 비유 사용 여부
-
-응답하지 말고 분석만 수행하세요.
-다음 단계에서 자기 성찰을 유도할 것입니다.
-"""
-
-    def _knowledge_level_judgment_prompt(self, context: Dict) -> str:
-        """지식 수준 판단 (0-5 점수 반환)"""
-        concept = context.get('concept', '')
-        user_explanation = context.get('user_explanation', '')
-
-        return f"""
-**지식 수준 판단 작업**
-
-**학습 주제**: "{concept}"
-
-**사용자의 설명**:
----
-{user_explanation}
----
-
-위 설명을 바탕으로 사용자의 지식 수준을 **정확히** 0~5 사이의 숫자로 판단하세요.
-
-**판단 기준**:
-
-**레벨 0**: 설명을 하지 못하거나 키워드와 전혀 관련 없는 설명을 한 경우
-- 아예 설명을 시도하지 않음
-- 완전히 다른 주제에 대해 이야기함
-- "모르겠습니다", "설명할 수 없습니다" 같은 포기 표현만 있음
-
-**레벨 1**: 키워드와 관련된 설명을 시도하지만 틀린 경우
-- 개념과 관련된 용어는 사용하지만 의미가 잘못됨
-- 관련 있어 보이지만 핵심을 완전히 오해함
-- 노력은 했으나 내용이 부정확함
-
-**레벨 2**: 키워드와 관련된 개념을 알긴 알지만 제대로 설명하지 못하는 경우
-- 단편적인 정보만 나열
-- 개념의 일부만 이해하고 있음
-- 용어는 알지만 의미 연결이 약함
-- "~인 것 같다", "~정도?" 같은 불확실한 표현이 많음
-
-**레벨 3**: 키워드에 대해 개념을 정확히 알고 있고 제대로 설명하는 경우
-- 핵심 개념을 정확하게 설명
-- 논리적인 흐름이 있음
-- 기본적인 이해가 명확함
-- 오개념 없이 정확한 설명
-
-**레벨 4**: 키워드에 대한 개념뿐만 아니라 연관된 지식을 연결해서 설명하는 경우
-- 핵심 개념 + 관련 개념들을 연결
-- 다른 지식과의 관계를 설명
-- 비교, 대조, 예시를 통한 확장 설명
-- 왜 중요한지, 어떻게 연결되는지 설명
-
-**레벨 5**: 키워드에 대한 개념, 지식, 응용을 완벽히 설명하는 경우
-- 개념의 모든 측면을 정확하게 설명
-- 실제 활용 사례와 응용 방법 제시
-- 심화 개념까지 연결
-- 초보자도 이해할 수 있게 명확하고 체계적으로 설명
-- 비유, 예시, 실생활 적용이 풍부함
-
-**응답 형식** (반드시 이 형식을 따르세요):
-```
-지식수준: [0-5 사이의 숫자 하나]
-이유: [1-2줄로 간단히 판단 근거 설명]
-```
-
-**주의사항**:
-- 반드시 0, 1, 2, 3, 4, 5 중 **정확히 하나의 숫자**만 반환
-- 소수점이나 범위(예: 2-3) 사용 금지
-- 판단은 엄격하게: 확실하지 않으면 낮은 점수
-- 형식을 정확히 지킬 것
-"""
-
-    def _self_reflection_1_prompt(self, context: Dict) -> str:
-        """자기 성찰 유도"""
-        return """
-사용자에게 자기 성찰을 유도하는 단계입니다.
-
-지침:
-- 직접적인 평가나 정답을 제시하지 않음
-- 사용자 스스로 부족한 부분을 인식하도록 유도
-- "잘 설명하셨네요. 혹시 설명하면서 확신이 없었거나 막혔던 부분이 있으셨나요?" 같은 질문 사용
-"""
+    def _knowledge_level_judgment_slots(self, context: Dict) -> Dict[str, str]:
+        """지식 수준 판단 슬롯"""
+        return {
+            "concept": context.get('concept', '') or '',
+            "user_explanation": context.get('user_explanation', '') or '',
+        }
 
-    def _ai_explanation_prompt(self, context: Dict) -> str:
-        """AI의 맞춤 설명"""
-        concept = context.get('concept', '')
+    def _ai_explanation_slots(self, context: Dict) -> Dict[str, str]:
+        """AI 맞춤 설명 슬롯"""
+        concept = context.get('concept', '') or ''
         original_question = context.get('original_question', '')
         user_level = context.get('knowledge_level', 'beginner')
         weak_points = context.get('weak_points', [])
@@ -204,15 +215,16 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
         # 학습 주제 표시
         if is_long_text:
             # PDF 경로: 긴 텍스트
-            subject_info = f"""
-학습 자료:
+            subject_info = f"""학습 자료:
 ---
 {concept}
 ---
 위 내용에 대해 설명합니다."""
+            title = "학습 자료"
         else:
             # 채팅 경로: 짧은 키워드
             subject_info = f'학습 주제: "{concept}"'
+            title = concept
 
         # 원본 질문으로 맥락 보강
         context_info = ""
@@ -221,23 +233,81 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
             context_info = f"\n\n맥락 정보: 사용자는 \"{original_question}\"라고 질문했습니다."
             context_info += "\n→ 이 맥락에 맞는 의미와 영역에 집중하여 설명하세요."
 
-        return f"""
-{subject_info}{context_info}
+        return {
+            "subject_info": subject_info,
+            "context_info": context_info,
+            "user_level": str(user_level),
+            "weak_points": ', '.join(weak_points) if weak_points else '전반적 이해 필요',
+            "title": title,
+        }
+
+    def _evaluation_slots(self, context: Dict) -> Dict[str, str]:
+        """종합 평가 슬롯"""
+        concept = context.get('concept', '') or ''
+        original_question = context.get('original_question', '')
+
+        # 평가 대상 명시
+        subject_info = f'평가 대상 개념: "{concept}"'
+        if original_question and original_question != concept:
+            subject_info += f'\n(원본 질문: "{original_question}")'
+
+        return {"subject_info": subject_info, "concept": concept}
 
-사용자의 현재 이해 수준: {user_level}
-부족한 부분: {', '.join(weak_points) if weak_points else '전반적 이해 필요'}
 
+# ========== 단계별 템플릿 ==========
+# 정적 부분에는 요청마다 바뀌는 값(개념, 지식 수준, 사용자 설명)을 넣지 않는다.
+# 바뀌는 값은 DYNAMIC 템플릿의 $슬롯으로 프롬프트 맨 끝에 붙는다.
+
+DEFAULT_STATIC = "사용자의 질문에 파인만 학습법 원칙에 따라 답변하세요."
+
+KNOWLEDGE_CHECK_STATIC = """
+사용자의 지식 수준을 파악하기 위한 단계입니다.
+
+응답 형식:
+- 친근하고 격려하는 톤 사용
+- 사용자가 '알고 있다'를 선택하면 설명 준비 안내
+- '모른다'를 선택하면 기초부터 차근차근 설명 준비
+"""
+
+KNOWLEDGE_CHECK_DYNAMIC = """
+사용자가 "$concept"에 대해 질문했습니다.$context_info
+"""
+
+FIRST_EXPLANATION_STATIC = """
+사용자가 자신이 아는 만큼 개념을 설명했습니다.
+이제 사용자의 설명을 분석해야 합니다.
+
+분석 포인트:
+1. 정확한 이해 부분 확인
+2. 오개념이나 부족한 부분 파악
+3. 사용된 언어의 복잡도 평가
+4. 예시나 비유 사용 여부
+
+응답하지 말고 분석만 수행하세요.
+다음 단계에서 자기 성찰을 유도할 것입니다.
+"""
+
+SELF_REFLECTION_1_STATIC = """
+사용자에게 자기 성찰을 유도하는 단계입니다.
+
+지침:
+- 직접적인 평가나 정답을 제시하지 않음
+- 사용자 스스로 부족한 부분을 인식하도록 유도
+- "잘 설명하셨네요. 혹시 설명하면서 확신이 없었거나 막혔던 부분이 있으셨나요?" 같은 질문 사용
+"""
+
+AI_EXPLANATION_STATIC = """
 **설명 기준:**
-1. 반드시 위 학습 주제/자료와 맥락에 맞게 설명할 것
+1. 반드시 아래 학습 주제/자료와 맥락에 맞게 설명할 것
 2. 다의어인 경우 원본 질문의 맥락을 고려하여 적절한 의미로 설명
 3. 사용자가 이미 이해한 부분은 간단히 확인만
 4. 부족한 부분을 중점적으로 설명
 5. 구체적인 예시와 비유 사용
 6. 전문 용어는 사용자의 수준에 맞추어 적절한 말로 바꾸기
 
-**답변 형식 (정확히 따를 것):**
+**답변 형식 (정확히 따를 것, [학습 주제]는 아래 주제로 바꿀 것):**
 
-📚 **{concept}** 설명
+📚 **[학습 주제]** 설명
 
 ---
 
@@ -282,18 +352,22 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
 
 ---
 
-
-
 **주의:**
 - 이모지 일관 사용 (📚💡🔍❓📌)
 - 마크다운 형식 준수
 - 각 섹션 구분 명확히
 - '💬 이해가 되셨나요? 궁금한 점 있으면 물어보세요!'와 같은 말 금지
 """
-    
-    def _second_explanation_prompt(self, context: Dict) -> str:
-        """두 번째 설명 요청"""
-        return """
+
+AI_EXPLANATION_DYNAMIC = """
+$subject_info$context_info
+
+학습 주제(제목): $title
+사용자의 현재 이해 수준: $user_level
+부족한 부분: $weak_points
+"""
+
+SECOND_EXPLANATION_STATIC = """
 사용자가 학습한 내용을 다시 설명하는 단계입니다.
 
 지침:
@@ -303,9 +377,7 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
 - 격려하면서도 정확한 피드백 제공
 """
 
-    def _self_reflection_2_prompt(self, context: Dict) -> str:
-        """두 번째 자기 성찰"""
-        return """
+SELF_REFLECTION_2_STATIC = """
 두 번째 자기 성찰 단계입니다.
 
 지침:
@@ -314,19 +386,71 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
 - 종합 평가를 위한 준비
 """
 
-    def _evaluation_prompt(self, context: Dict) -> str:
-        """종합 평가"""
-        concept = context.get('concept', '')
-        original_question = context.get('original_question', '')
+KNOWLEDGE_LEVEL_JUDGMENT_DYNAMIC = """
+**학습 주제**: "$concept"
 
-        # 평가 대상 명시
-        subject_info = f'평가 대상 개념: "{concept}"'
-        if original_question and original_question != concept:
-            subject_info += f'\n(원본 질문: "{original_question}")'
+**사용자의 설명**:
+---
+$user_explanation
+---
+"""
+
+KNOWLEDGE_LEVEL_JUDGMENT_STATIC = """
+**지식 수준 판단 작업**
 
-        return f"""
-{subject_info}
+아래 설명을 바탕으로 사용자의 지식 수준을 **정확히** 0~5 사이의 숫자로 판단하세요.
 
+**판단 기준**:
+
+**레벨 0**: 설명을 하지 못하거나 키워드와 전혀 관련 없는 설명을 한 경우
+- 아예 설명을 시도하지 않음
+- 완전히 다른 주제에 대해 이야기함
+- "모르겠습니다", "설명할 수 없습니다" 같은 포기 표현만 있음
+
+**레벨 1**: 키워드와 관련된 설명을 시도하지만 틀린 경우
+- 개념과 관련된 용어는 사용하지만 의미가 잘못됨
+- 관련 있어 보이지만 핵심을 완전히 오해함
+- 노력은 했으나 내용이 부정확함
+
+**레벨 2**: 키워드와 관련된 개념을 알긴 알지만 제대로 설명하지 못하는 경우
+- 단편적인 정보만 나열
+- 개념의 일부만 이해하고 있음
+- 용어는 알지만 의미 연결이 약함
+- "~인 것 같다", "~정도?" 같은 불확실한 표현이 많음
+
+**레벨 3**: 키워드에 대해 개념을 정확히 알고 있고 제대로 설명하는 경우
+- 핵심 개념을 정확하게 설명
+- 논리적인 흐름이 있음
+- 기본적인 이해가 명확함
+- 오개념 없이 정확한 설명
+
+**레벨 4**: 키워드에 대한 개념뿐만 아니라 연관된 지식을 연결해서 설명하는 경우
+- 핵심 개념 + 관련 개념들을 연결
+- 다른 지식과의 관계를 설명
+- 비교, 대조, 예시를 통한 확장 설명
+- 왜 중요한지, 어떻게 연결되는지 설명
+
+**레벨 5**: 키워드에 대한 개념, 지식, 응용을 완벽히 설명하는 경우
+- 개념의 모든 측면을 정확하게 설명
+- 실제 활용 사례와 응용 방법 제시
+- 심화 개념까지 연결
+- 초보자도 이해할 수 있게 명확하고 체계적으로 설명
+- 비유, 예시, 실생활 적용이 풍부함
+
+**응답 형식** (반드시 이 형식을 따르세요):
+```
+지식수준: [0-5 사이의 숫자 하나]
+이유: [1-2줄로 간단히 판단 근거 설명]
+```
+
+**주의사항**:
+- 반드시 0, 1, 2, 3, 4, 5 중 **정확히 하나의 숫자**만 반환
+- 소수점이나 범위(예: 2-3) 사용 금지
+- 판단은 엄격하게: 확실하지 않으면 낮은 점수
+- 형식을 정확히 지킬 것
+"""
+
+EVALUATION_STATIC = """
 사용자의 두 번의 설명과 자기 성찰을 바탕으로 종합 평가를 제공합니다.
 
 **평가 기준:**
@@ -355,11 +479,11 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
    - 현재 보유 지식 분석
    - 추가 학습 필요 영역
 
-**답변 형식 (정확히 따를 것):**
+**답변 형식 (정확히 따를 것, [평가 대상 개념]은 아래 개념으로 바꿀 것):**
 
 🎓 **학습 종합 평가**
 
-개념: "{concept}"
+개념: "[평가 대상 개념]"
 
 ---
 
@@ -471,4 +595,8 @@ PDF나 이미지를 업로드하면 더 정확한 학습이 가능함을 안내
 - 각 항목은 기준에 따라 구체적 피드백
 """
 
+EVALUATION_DYNAMIC = """
+$subject_info
+"""
+
 feynman_engine = FeynmanPromptEngine()
\ No newline at end of file
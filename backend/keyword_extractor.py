@@ -0,0 +1,208 @@
+# backend/keyword_extractor.py
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from llm_client import llm_client, LLMError
+from llm_gateway import Priority
+from model_routing import model_router
+
+KEYWORD_CACHE_SIZE = int(os.getenv("KEYWORD_CACHE_SIZE", "1024"))
+KEYWORD_LLM_TIMEOUT = 15.0
+MAX_RULE_KEYWORD_CHARS = 40  # 규칙으로 뽑은 키워드가 이보다 길면 LLM에 맡김
+MAX_RULE_KEYWORD_WORDS = 6
+MIN_RULE_KEYWORD_CHARS = 2  # 한 글자("이", "그")는 명사인지 알 수 없으므로 LLM
+
+TRAILING_PUNCTUATION = re.compile(r"[\s?!.~…]+$")
+
+# "~ 알려줘", "~에 대해 설명해줘" 류 요청형 어미
+REQUEST_ENDING = re.compile(
+    r"^(?P<keyword>.+?)\s*(?:에\s*대해서?|에\s*대하여|에\s*관해서?)?\s*(?:좀\s*)?"
+    r"(?:알려\s*줘|알려\s*주세요|알려\s*줄래|설명\s*해\s*줘|설명\s*해\s*주세요|설명\s*해\s*줄래|가르쳐\s*줘|가르쳐\s*주세요)$"
+)
+# "~은 뭐야", "~란 무엇인가요" 류 의문형 어미
+QUESTION_ENDING = re.compile(
+    r"^(?P<keyword>.+?)\s*(?:(?P<particle>이란|란|이|가|은|는)\s*)?"
+    r"(?:뭐야|뭐예요|뭐에요|뭔가요|뭐지|뭘까요?|무엇인가요|무엇이야|무엇이에요|무엇일까요?)$"
+)
+# 명사 끝 글자일 수도 있는 조사 ("고양이 뭐야"의 "이") → 규칙으로 자르지 않고 LLM
+AMBIGUOUS_PARTICLES = {"이", "가"}
+# 어미만으로 핵심을 가리기 어려운 질문 (이유/방법) → LLM
+COMPLEX_QUESTION = re.compile(r"왜|어떻게|어째서")
+# 앞 대화를 가리키는 지시어 ("이게 뭐야", "그거 알려줘") → 규칙으로는 개념을 알 수 없으므로 LLM
+DEMONSTRATIVES = {
+    "이", "그", "저", "이거", "그거", "저거", "이게", "그게", "저게", "이건", "그건", "저건",
+    "이것", "그것", "저것", "요거", "요게", "여기", "거기", "저기",
+}
+# 인사/감탄사/의문사만 있는 입력 ("안녕", "뭐야") → 개념 키워드가 아님
+INTERJECTIONS = {
+    "안녕", "안녕하세요", "하이", "헬로", "네", "예", "응", "음", "아", "어", "오", "와",
+    "고마워", "감사합니다", "몰라", "뭐", "뭐야", "뭐지", "뭔데", "무엇", "무슨",
+}
+JAMO_ONLY = re.compile(r"^[ㄱ-ㅎㅏ-ㅣ]+$")  # "ㅋㅋ", "ㅇㅇ"
+
+EXTRACTION_PROMPT = """다음 질문에서 핵심 키워드를 추출하세요.
+
+질문: {user_message}
+
+매우 중요한 규칙:
+1. 원본 질문에 있는 단어만 사용하세요 (새로운 단어 추가 절대 금지!)
+2. 질문 어미만 제거하세요 ("-뭐야?", "-이야?", "-인가요?", "알려줘", "설명해줘", "에 대해" 등)
+3. 핵심 개념/주제는 그대로 유지
+4. 짧은 질문은 전체가 키워드일 수 있음
+5. 긴 질문도 의문형 어미만 제거하고 내용은 유지
+6. 원본에 없는 단어를 절대 추가하지 마세요!
+
+좋은 예 (원본 단어만 사용):
+질문: "빅데이터의 개념이 뭐야?" → 빅데이터의 개념
+질문: "입출력 모듈이 메세지를 인식하는 과정" → 입출력 모듈이 메세지를 인식하는 과정
+질문: "머신러닝 알고리즘 설명해줘" → 머신러닝 알고리즘
+질문: "자료구조에 대해 알려줘" → 자료구조
+
+나쁜 예 (원본에 없는 단어 추가 - 절대 금지):
+질문: "입출력 모듈이 메세지를 인식하는 과정" → 입출력 모듈, 프로세싱, 데이터 전달 (❌ "프로세싱", "데이터 전달"은 원본에 없음)
+질문: "빅데이터의 개념이 뭐야?" → 빅데이터, 정의, 특징 (❌ "정의", "특징"은 원본에 없음)
+질문: "자료구조에 대해서 알려줘" → 자료구조에서 추출한 키워드는 자료구조입니다 (❌ 설명 포함)
+
+원본 질문의 단어만 사용해서 키워드 출력:"""
+
+
+def normalize_message(text: str) -> str:
+    """캐시 키용 정규화 (공백 정리, 끝 문장부호 제거, 소문자)"""
+    return TRAILING_PUNCTUATION.sub("", " ".join(text.split())).lower()
+
+
+def is_concept_keyword(keyword: str) -> bool:
+    """규칙으로 뽑은 키워드가 개념 이름으로 쓸 만한지 (지시어/감탄사/너무 짧은 입력 제외)"""
+    words = keyword.split()
+    return (
+        len(keyword) >= MIN_RULE_KEYWORD_CHARS
+        and keyword not in INTERJECTIONS
+        and not JAMO_ONLY.match(keyword)
+        and not any(word in DEMONSTRATIVES for word in words)
+    )
+
+
+def rule_based_keyword(user_message: str) -> Optional[str]:
+    """한국어 질문 어미 규칙으로 키워드 추출 (확신할 수 있을 때만, 아니면 None)"""
+    text = TRAILING_PUNCTUATION.sub("", " ".join(user_message.split()))
+    if not text or COMPLEX_QUESTION.search(text):
+        return None
+
+    for pattern in (REQUEST_ENDING, QUESTION_ENDING):
+        match = pattern.match(text)
+        if match:
+            if match.groupdict().get("particle") in AMBIGUOUS_PARTICLES:
+                return None
+            keyword = match.group("keyword").strip()
+            if (
+                is_concept_keyword(keyword)
+                and len(keyword) <= MAX_RULE_KEYWORD_CHARS
+                and len(keyword.split()) <= MAX_RULE_KEYWORD_WORDS
+            ):
+                return keyword
+            return None
+
+    # 어미 없는 한 단어 입력은 전체가 키워드 ("자료구조"), 여러 단어는 LLM이 판단
+    if len(text) <= 20 and len(text.split()) == 1 and "?" not in user_message and is_concept_keyword(text):
+        return text
+    return None
+
+
+def clean_llm_keyword(response_text: str) -> str:
+    """LLM 응답에서 키워드만 남김 (첫 줄, 설명 문구/따옴표 제거)"""
+    # 첫 줄만 가져오기 (추가 설명 제거)
+    keyword = response_text.strip().split('\n')[0].strip()
+
+    # "~에서 추출한 키워드는", "키워드:" 등의 패턴 제거
+    keyword = re.sub(r'.*(에서\s*추출한\s*키워드는?|키워드는?)\s*', '', keyword)
+    # "입니다", ".", ":" 등 제거
+    keyword = re.sub(r'[.:!?]$', '', keyword)
+    keyword = keyword.replace('입니다', '').replace('습니다', '').strip()
+
+    # 따옴표 제거
+    return keyword.strip('"\'')
+
+
+class ConceptKeywordExtractor:
+    """사용자 질문에서 핵심 개념 키워드 추출
+
+    1) 정규화한 질문 기준 LRU 캐시 → 2) 질문 어미 규칙 → 3) LLM 순서로 시도한다.
+    규칙은 확신할 수 있는 경우에만 답하고, 나머지는 LLM 결과를 캐시해 재사용한다.
+    """
+
+    def __init__(self, cache_size: int = KEYWORD_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.stats: Dict[str, int] = {"cache_hits": 0, "rule_hits": 0, "llm_calls": 0, "llm_failures": 0}
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        keyword = self._cache.get(key)
+        if keyword is not None:
+            self._cache.move_to_end(key)
+        return keyword
+
+    def _cache_put(self, key: str, keyword: str) -> None:
+        self._cache[key] = keyword
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def quick(self, user_message: str) -> Optional[str]:
+        """LLM 없이 얻을 수 있는 키워드 (캐시 또는 규칙), 없으면 None"""
+        key = normalize_message(user_message)
+        keyword = self._cache_get(key)
+        if keyword is not None:
+            self.stats["cache_hits"] += 1
+            return keyword
+
+        keyword = rule_based_keyword(user_message)
+        if keyword is not None:
+            self.stats["rule_hits"] += 1
+            self._cache_put(key, keyword)
+        return keyword
+
+    async def extract(self, user_message: str, user_id: Optional[str] = None) -> str:
+        """키워드 추출 (실패 시 원본 반환)"""
+        keyword = self.quick(user_message)
+        if keyword is not None:
+            print(f"⚡ 키워드 빠른 추출: '{user_message}' → '{keyword}'")
+            return keyword
+
+        started = time.monotonic()
+        try:
+            print(f"🔍 키워드 추출 중: '{user_message}'")
+            self.stats["llm_calls"] += 1
+            result = await llm_client.generate(
+                EXTRACTION_PROMPT.format(user_message=user_message),
+                timeout=KEYWORD_LLM_TIMEOUT,
+                priority=Priority.INTERACTIVE,  # 사용자가 단계 전환을 기다림
+                user_id=user_id,
+                **model_router.params("keyword")
+            )
+        except LLMError as e:
+            self.stats["llm_failures"] += 1
+            model_router.record("keyword", started, ok=False)
+            print(f"⚠️ 키워드 추출 실패 (상태: {e.status_code}), 원본 사용")
+            return user_message
+        except Exception as e:
+            self.stats["llm_failures"] += 1
+            model_router.record("keyword", started, ok=False)
+            print(f"⚠️ 키워드 추출 오류: {e}, 원본 사용")
+            return user_message
+
+        keyword = clean_llm_keyword(result.get("response", ""))
+        model_router.record("keyword", started, ok=bool(keyword))
+        print(f"✅ 추출된 키워드: '{keyword}'")
+        if not keyword:
+            return user_message
+
+        self._cache_put(normalize_message(user_message), keyword)
+        return keyword
+
+    def metrics(self) -> Dict:
+        return {**self.stats, "cache_size": len(self._cache)}
+
+# 전역 인스턴스
+concept_keyword_extractor = ConceptKeywordExtractor()
@@ -0,0 +1,150 @@
+# backend/knowledge_judgment.py
+import asyncio
+import os
+import re
+import time
+from typing import Dict, Optional
+import models
+from database import SessionLocal
+from feynman_prompts import feynman_engine
+from llm_client import llm_client, LLMError
+from llm_gateway import Priority
+from model_routing import model_router
+from room_connections import room_connections
+
+KNOWLEDGE_JUDGMENT_TIMEOUT = 30.0
+# AI_EXPLANATION 단계에서 판단 결과를 기다리는 최대 시간 (넘으면 기존 값으로 진행)
+KNOWLEDGE_JUDGMENT_WAIT_SECONDS = float(os.getenv("KNOWLEDGE_JUDGMENT_WAIT_SECONDS", "20"))
+
+
+def parse_knowledge_level(ai_response: str) -> Optional[int]:
+    """"지식수준: 3" 형식에서 0-5 숫자 추출 (없거나 범위 밖이면 None)"""
+    match = re.search(r'지식수준\s*:\s*(\d)', ai_response)
+    if not match:
+        print(f"⚠️ 응답에서 지식 수준 숫자를 찾을 수 없음, 기본값 유지")
+        return None
+
+    knowledge_level = int(match.group(1))
+    if not 0 <= knowledge_level <= 5:
+        print(f"⚠️ 범위 벗어남 ({knowledge_level}), 기본값 유지")
+        return None
+    return knowledge_level
+
+
+class KnowledgeJudgmentJobs:
+    """첫 번째 설명에 대한 지식 수준 판단을 요청 경로 밖에서 실행하는 백그라운드 작업
+
+    채팅방마다 최신 작업 하나만 추적한다. 결과는 별도 DB 세션으로 ChatRoom.knowledge_level에
+    저장하고, 그 방에 열린 WebSocket으로 {"type": "knowledge_level"} 메시지를 보낸다.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, asyncio.Task] = {}
+
+    def start(self, room_id: str, user_id: str, concept: str, user_explanation: str) -> None:
+        """판단 작업 시작 (같은 방의 이전 작업은 취소)"""
+        previous = self._jobs.get(room_id)
+        if previous is not None and not previous.done():
+            previous.cancel()
+
+        task = asyncio.get_running_loop().create_task(
+            self._judge(room_id, user_id, concept, user_explanation)
+        )
+        self._jobs[room_id] = task
+        task.add_done_callback(lambda done, room_id=room_id: self._forget(room_id, done))
+
+    def _forget(self, room_id: str, task: asyncio.Task) -> None:
+        if self._jobs.get(room_id) is task:
+            del self._jobs[room_id]
+
+    def is_pending(self, room_id: str) -> bool:
+        task = self._jobs.get(room_id)
+        return task is not None and not task.done()
+
+    async def wait(self, room_id: str, timeout: float = KNOWLEDGE_JUDGMENT_WAIT_SECONDS) -> bool:
+        """진행 중인 판단이 있으면 끝날 때까지(최대 timeout) 대기, 기다렸으면 True"""
+        task = self._jobs.get(room_id)
+        if task is None or task.done():
+            return False
+
+        print(f"⏳ 지식 수준 판단 대기: Room {room_id}")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                await asyncio.wait_for(asyncio.shield(task), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                print(f"⚠️ 지식 수준 판단 대기 시간 초과 ({timeout}초), 기존 값으로 진행")
+            except asyncio.CancelledError:
+                # 대기 중 새 start()가 기다리던 판단을 취소한 경우 → 새 판단을 이어서 기다림.
+                # 대기자 자신이 취소된 경우(판단 작업은 shield로 살아 있음)만 전파
+                if not task.cancelled():
+                    raise
+                task = self._jobs.get(room_id)
+                if task is not None and not task.done():
+                    continue
+            except Exception:
+                pass
+            return True
+
+    async def _judge(self, room_id: str, user_id: str, concept: str, user_explanation: str) -> None:
+        """사용자의 첫 번째 설명을 분석하여 지식 수준 (0-5) 판단 및 저장"""
+        print(f"🧠 지식 수준 판단 시작: Room {room_id}, Concept: {concept}")
+
+        # 판단 프롬프트 생성
+        judgment_prompt = feynman_engine.get_knowledge_level_judgment_prompt(concept, user_explanation)
+
+        started = time.monotonic()
+        try:
+            result = await llm_client.generate(
+                judgment_prompt,
+                timeout=KNOWLEDGE_JUDGMENT_TIMEOUT,
+                priority=Priority.JUDGMENT,
+                user_id=user_id,
+                **model_router.params("judgment")
+            )
+        except LLMError as e:
+            model_router.record("judgment", started, ok=False)
+            print(f"⚠️ AI 호출 실패 (상태: {e.status_code}), 기본값 유지")
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            model_router.record("judgment", started, ok=False)
+            print(f"❌ 지식 수준 판단 오류: {e}, 기본값 유지")
+            return
+
+        ai_response = result.get("response", "").strip()
+        print(f"📊 AI 판단 결과:\n{ai_response}")
+
+        knowledge_level = parse_knowledge_level(ai_response)
+        model_router.record("judgment", started, ok=knowledge_level is not None)
+        if knowledge_level is None:
+            return
+
+        db = SessionLocal()
+        try:
+            room = db.query(models.ChatRoom).filter(models.ChatRoom.id == room_id).first()
+            if room is None:
+                return
+            room.knowledge_level = knowledge_level
+            db.commit()
+        finally:
+            db.close()
+        print(f"✅ 지식 수준 저장: {knowledge_level}")
+
+        await room_connections.broadcast(room_id, {
+            "type": "knowledge_level",
+            "knowledge_level": knowledge_level
+        })
+
+    async def shutdown(self) -> None:
+        """진행 중인 판단 작업 취소 (서버 종료 시)"""
+        tasks = list(self._jobs.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+# 전역 인스턴스
+knowledge_judgment_jobs = KnowledgeJudgmentJobs()
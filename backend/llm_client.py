@@ -0,0 +1,358 @@
+# backend/llm_client.py
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from dotenv import load_dotenv
+from llm_gateway import llm_gateway, Priority
+
+load_dotenv()
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+DEFAULT_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
+
+# 연결 풀 설정 (max_connections가 Ollama로 가는 동시 요청 상한)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "8"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "8"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_DEFAULT_TIMEOUT = float(os.getenv("LLM_DEFAULT_TIMEOUT", "60"))
+# 요청 후 모델을 메모리에 유지할 시간 (Ollama 기본 5분이 지나면 재로딩 + KV 캐시 유실)
+LLM_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+COLD_LOAD_THRESHOLD_MS = 500  # load_duration이 이보다 길면 모델을 새로 올린 것으로 봄
+# 동시에 들어온 똑같은 (model, prompt, options) 요청은 Ollama 생성 한 번을 공유
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "1") == "1"
+
+
+class LLMError(Exception):
+    """Ollama가 200이 아닌 응답을 반환"""
+
+    def __init__(self, status_code: int, detail: str = ""):
+        super().__init__(f"Ollama error: {status_code} {detail}".strip())
+        self.status_code = status_code
+
+
+def flight_key(kind: str, model: str, prompt: str, payload: Dict, priority: Priority) -> str:
+    """동일 요청 판별 키 (model, prompt, options/format/context 등 모든 payload, 우선순위)
+
+    우선순위가 다르면 합치지 않는다. 합류한 호출자는 첫 요청의 우선순위로 게이트웨이
+    대기열에 서므로, 대화 요청이 IDLE 사전 생성 뒤에 밀리는 일을 막기 위함.
+    """
+    raw = json.dumps([kind, model, prompt, payload, int(priority)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _GenerateFlight:
+    """진행 중인 단건 생성 하나와 그 결과를 기다리는 호출자 수"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _StreamFlight:
+    """진행 중인 스트리밍 생성 하나를 여러 구독자에게 나눠 주는 버퍼
+
+    업스트림 청크를 모두 보관하므로 늦게 합류한 구독자도 처음부터 같은 토큰을 받는다.
+    """
+
+    def __init__(self):
+        self.chunks: List[Dict] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._event = asyncio.Event()
+
+    def publish(self, chunk: Dict) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.finished = True
+        self.error = error
+        self._notify()
+
+    def _notify(self) -> None:
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[Dict]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._event.wait()
+
+
+class LLMClient:
+    """애플리케이션 전역 Ollama 클라이언트 (keep-alive 연결 풀 공유)
+
+    서버 시작 시 start(), 종료 시 close()를 호출한다.
+    모든 호출은 llm_gateway 슬롯을 받은 뒤 실행되므로 우선순위와 사용자별
+    공정성에 따라 Ollama 동시 실행 수가 제한된다.
+    같은 우선순위의 같은 요청이 동시에 여러 번 들어오면 첫 요청(사용자 기준도 첫 요청)만
+    Ollama로 보내고 나머지는 그 결과/토큰 스트림을 함께 받는다 (single-flight).
+    기다리는 호출자가 모두 떠나면 업스트림 요청도 취소된다.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_URL):
+        self.base_url = base_url
+        self._client: Optional[httpx.AsyncClient] = None
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._generate_flights: Dict[str, _GenerateFlight] = {}
+        self._stream_flights: Dict[str, _StreamFlight] = {}
+        self.flight_stats: Dict[str, int] = {"upstream": 0, "coalesced": 0}
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+            ),
+            timeout=self._timeout(LLM_DEFAULT_TIMEOUT)
+        )
+        print(f"🔌 LLM 클라이언트 시작: {self.base_url} (최대 연결 {LLM_MAX_CONNECTIONS}개)")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            print("🔌 LLM 클라이언트 종료")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("LLM 클라이언트가 시작되지 않았습니다 (startup 이벤트 확인)")
+        return self._client
+
+    def _timeout(self, timeout: float) -> httpx.Timeout:
+        return httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT, pool=None)
+
+    def _record_timings(self, model: str, data: Dict) -> None:
+        """최종 응답의 load/prefill/생성 시간(ns)을 모델별로 누적"""
+        self._last_used[model] = time.monotonic()
+        stats = self._timings.setdefault(model, {
+            "calls": 0, "cold_loads": 0, "load_ms": 0.0, "max_load_ms": 0.0,
+            "prompt_eval_ms": 0.0, "eval_ms": 0.0, "eval_tokens": 0
+        })
+        load_ms = data.get("load_duration", 0) / 1e6
+        stats["calls"] += 1
+        stats["load_ms"] += load_ms
+        stats["max_load_ms"] = max(stats["max_load_ms"], load_ms)
+        if load_ms > COLD_LOAD_THRESHOLD_MS:
+            stats["cold_loads"] += 1
+        stats["prompt_eval_ms"] += data.get("prompt_eval_duration", 0) / 1e6
+        stats["eval_ms"] += data.get("eval_duration", 0) / 1e6
+        stats["eval_tokens"] += data.get("eval_count", 0)
+
+    def idle_seconds(self, model: str) -> Optional[float]:
+        """모델을 마지막으로 사용한 뒤 지난 시간 (사용한 적 없으면 None)"""
+        last_used = self._last_used.get(model)
+        return time.monotonic() - last_used if last_used is not None else None
+
+    def timings(self) -> Dict:
+        """모델별 로딩 시간과 생성 시간을 분리한 통계"""
+        result = {}
+        for model, stats in self._timings.items():
+            calls = stats["calls"]
+            result[model] = {
+                "calls": calls,
+                "cold_loads": stats["cold_loads"],
+                "avg_load_ms": round(stats["load_ms"] / calls, 1),
+                "max_load_ms": round(stats["max_load_ms"], 1),
+                "avg_prompt_eval_ms": round(stats["prompt_eval_ms"] / calls, 1),
+                "avg_eval_ms": round(stats["eval_ms"] / calls, 1),
+                "tokens_per_second": round(stats["eval_tokens"] / (stats["eval_ms"] / 1000), 1) if stats["eval_ms"] else 0.0,
+            }
+        return result
+
+    def single_flight_metrics(self) -> Dict:
+        """업스트림 요청 수와 다른 요청에 합류해 생성을 아낀 횟수"""
+        total = self.flight_stats["upstream"] + self.flight_stats["coalesced"]
+        return {
+            "enabled": LLM_SINGLE_FLIGHT,
+            **self.flight_stats,
+            "coalesced_rate": round(self.flight_stats["coalesced"] / total, 3) if total else 0.0,
+            "in_flight": len(self._generate_flights) + len(self._stream_flights),
+        }
+
+    async def generate(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        timeout: float = LLM_DEFAULT_TIMEOUT,
+        priority: Priority = Priority.INTERACTIVE,
+        user_id: Optional[str] = None,
+        **payload
+    ) -> Dict:
+        """/api/generate 단건 호출 (stream=False), 응답 JSON 반환"""
+        payload.setdefault("keep_alive", LLM_KEEP_ALIVE)
+        upstream = self._generate_upstream(prompt, model, timeout, priority, user_id, payload)
+        if not LLM_SINGLE_FLIGHT:
+            return await upstream
+
+        key = flight_key("generate", model, prompt, payload, priority)
+        flight = self._generate_flights.get(key)
+        if flight is None:
+            flight = _GenerateFlight(asyncio.ensure_future(upstream))
+            self._generate_flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._end_flight(self._generate_flights, key, flight))
+            self.flight_stats["upstream"] += 1
+        else:
+            upstream.close()  # 만들기만 한 코루틴 정리
+            self.flight_stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 기다리는 호출자가 없으면 생성 중단 (새 요청이 취소된 작업에 합류하지 않도록 먼저 제거)
+                self._end_flight(self._generate_flights, key, flight)
+                flight.task.cancel()
+        return dict(result)
+
+    @staticmethod
+    def _end_flight(flights: Dict, key: str, flight) -> None:
+        if flights.get(key) is flight:
+            del flights[key]
+
+    async def _generate_upstream(
+        self,
+        prompt: str,
+        model: str,
+        timeout: float,
+        priority: Priority,
+        user_id: Optional[str],
+        payload: Dict
+    ) -> Dict:
+        async with llm_gateway.slot(priority, user_id):
+            response = await self.client.post(
+                "/api/generate",
+                json={"model": model, "prompt": prompt, "stream": False, **payload},
+                timeout=self._timeout(timeout)
+            )
+        if response.status_code != 200:
+            raise LLMError(response.status_code, response.text[:200])
+        data = response.json()
+        if prompt:  # 빈 프롬프트(모델 로딩만)는 ModelKeeper가 따로 집계
+            self._record_timings(model, data)
+        else:
+            self._last_used[model] = time.monotonic()
+        return data
+
+    async def stream_generate(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        timeout: float = LLM_DEFAULT_TIMEOUT,
+        priority: Priority = Priority.INTERACTIVE,
+        user_id: Optional[str] = None,
+        **payload
+    ) -> AsyncIterator[Dict]:
+        """/api/generate 스트리밍 호출, 줄 단위 JSON 청크를 차례로 반환 (스트림 동안 슬롯 점유)"""
+        payload.setdefault("keep_alive", LLM_KEEP_ALIVE)
+        if not LLM_SINGLE_FLIGHT:
+            async for chunk_data in self._stream_upstream(prompt, model, timeout, priority, user_id, payload):
+                yield chunk_data
+            return
+
+        key = flight_key("stream", model, prompt, payload, priority)
+        flight = self._stream_flights.get(key)
+        if flight is None:
+            flight = _StreamFlight()
+            self._stream_flights[key] = flight
+            flight.task = asyncio.ensure_future(
+                self._pump_stream(key, flight, prompt, model, timeout, priority, user_id, payload)
+            )
+            self.flight_stats["upstream"] += 1
+        else:
+            self.flight_stats["coalesced"] += 1
+
+        flight.subscribers += 1
+        try:
+            async for chunk_data in flight.subscribe():
+                yield chunk_data
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.finished:
+                # 모든 구독자가 떠나면 생성 중단 (새 요청이 취소된 스트림에 합류하지 않도록 먼저 제거)
+                self._end_flight(self._stream_flights, key, flight)
+                flight.task.cancel()
+
+    async def _pump_stream(
+        self,
+        key: str,
+        flight: _StreamFlight,
+        prompt: str,
+        model: str,
+        timeout: float,
+        priority: Priority,
+        user_id: Optional[str],
+        payload: Dict
+    ) -> None:
+        """업스트림 스트림을 읽어 구독자 버퍼로 전달"""
+        try:
+            async for chunk_data in self._stream_upstream(prompt, model, timeout, priority, user_id, payload):
+                flight.publish(chunk_data)
+            flight.finish()
+        except asyncio.CancelledError as e:
+            flight.finish(e)
+            raise
+        except Exception as e:
+            flight.finish(e)
+        finally:
+            self._end_flight(self._stream_flights, key, flight)
+
+    async def _stream_upstream(
+        self,
+        prompt: str,
+        model: str,
+        timeout: float,
+        priority: Priority,
+        user_id: Optional[str],
+        payload: Dict
+    ) -> AsyncIterator[Dict]:
+        async with llm_gateway.slot(priority, user_id):
+            async with self.client.stream(
+                "POST",
+                "/api/generate",
+                json={"model": model, "prompt": prompt, "stream": True, **payload},
+                timeout=self._timeout(timeout)
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    raise LLMError(response.status_code, response.text[:200])
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        chunk_data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+                    if chunk_data.get("done", False):
+                        self._record_timings(model, chunk_data)
+                        yield chunk_data
+                        break
+
+                    yield chunk_data
+
+# 전역 인스턴스
+llm_client = LLMClient()
@@ -0,0 +1,139 @@
+# backend/llm_gateway.py
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Deque, Dict, List, Optional, Tuple
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))  # Ollama OLLAMA_NUM_PARALLEL에 맞춤
+LLM_IDLE_RESERVED_SLOTS = int(os.getenv("LLM_IDLE_RESERVED_SLOTS", "1"))  # IDLE 작업이 쓰지 못하게 남겨 둘 슬롯 수
+WAIT_SAMPLE_SIZE = 200  # 대기 시간 백분위 계산용 최근 표본 수
+
+
+class Priority(IntEnum):
+    """LLM 요청 우선순위 (숫자가 작을수록 먼저)"""
+    INTERACTIVE = 0  # 채팅 스트리밍, 사용자가 기다리는 호출
+    JUDGMENT = 1     # 지식 수준 판단 등 백그라운드 판단
+    BATCH = 2        # 퀴즈 생성 같은 대량 생성
+    IDLE = 3         # 퀴즈 풀 사전 생성 등 남는 용량에서만 실행
+
+
+class LLMGateway:
+    """프로세스 내 LLM 동시 실행 제한 + 우선순위/사용자별 공정 스케줄링
+
+    동시에 max_concurrency개까지만 Ollama에 요청을 보내고, 나머지는 대기열에서
+    (우선순위, 공정성 태그, 도착 순서) 순으로 슬롯을 받는다. 공정성 태그는
+    같은 우선순위 안에서 사용자마다 증가하므로 요청을 많이 쌓은 사용자가
+    다른 사용자를 밀어내지 못한다 (start-time fair queuing).
+    IDLE 요청은 LLM_IDLE_RESERVED_SLOTS개 슬롯을 남겨 둔 상태에서만 시작하므로
+    오래 걸리는 사전 생성이 채팅 응답을 막지 않는다.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._active = 0
+        self._queue: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._virtual_time: Dict[int, int] = {}
+        self._user_tags: Dict[Tuple[int, str], int] = {}
+        self._waiting: Dict[int, int] = {p.value: 0 for p in Priority}
+        self._served: Dict[int, int] = {p.value: 0 for p in Priority}
+        self._wait_total: Dict[int, float] = {p.value: 0.0 for p in Priority}
+        self._wait_max: Dict[int, float] = {p.value: 0.0 for p in Priority}
+        self._wait_samples: Dict[int, Deque[float]] = {p.value: deque(maxlen=WAIT_SAMPLE_SIZE) for p in Priority}
+
+    def _fair_tag(self, priority: int, user_id: Optional[str]) -> int:
+        virtual_time = self._virtual_time.get(priority, 0)
+        key = (priority, user_id or "")
+        tag = max(virtual_time, self._user_tags.get(key, 0)) + 1
+        self._user_tags[key] = tag
+        return tag
+
+    def _record_wait(self, priority: int, waited: float) -> None:
+        self._served[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        self._wait_samples[priority].append(waited)
+
+    def _slot_limit(self, priority: int) -> int:
+        if priority >= Priority.IDLE:
+            return max(1, self.max_concurrency - LLM_IDLE_RESERVED_SLOTS)
+        return self.max_concurrency
+
+    def _dispatch(self) -> None:
+        while self._queue:
+            priority, tag, _, future = self._queue[0]
+            if future.done():  # 대기 중 취소됨
+                heapq.heappop(self._queue)
+                continue
+            if self._active >= self._slot_limit(priority):
+                break
+            heapq.heappop(self._queue)
+            self._virtual_time[priority] = max(self._virtual_time.get(priority, 0), tag)
+            self._active += 1
+            future.set_result(None)
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE, user_id: Optional[str] = None) -> None:
+        priority = int(priority)
+        enqueued_at = time.monotonic()
+
+        if self._active < self._slot_limit(priority) and not self._queue:
+            self._active += 1
+            self._record_wait(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, self._fair_tag(priority, user_id), next(self._seq), future))
+        self._waiting[priority] += 1
+        # 대기열이 있어도 빈 슬롯이 있을 수 있음 (IDLE만 슬롯 제한에 걸려 대기 중인 경우)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 슬롯을 받은 직후 취소 → 반납
+                self.release()
+            raise
+        finally:
+            self._waiting[priority] -= 1
+        self._record_wait(priority, time.monotonic() - enqueued_at)
+
+    def release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE, user_id: Optional[str] = None):
+        """LLM 호출 구간을 감싸는 슬롯 (async with llm_gateway.slot(...))"""
+        await self.acquire(priority, user_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> Dict:
+        """우선순위별 대기열 길이와 대기 시간 통계"""
+        by_priority = {}
+        for p in Priority:
+            samples = sorted(self._wait_samples[p.value])
+            served = self._served[p.value]
+            by_priority[p.name.lower()] = {
+                "queue_depth": self._waiting[p.value],
+                "served": served,
+                "avg_wait_ms": round(self._wait_total[p.value] / served * 1000, 1) if served else 0.0,
+                "p95_wait_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 1) if samples else 0.0,
+                "max_wait_ms": round(self._wait_max[p.value] * 1000, 1),
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queue_depth": sum(self._waiting.values()),
+            "priorities": by_priority,
+        }
+
+# 전역 인스턴스
+llm_gateway = LLMGateway()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+PDF 원본 저장소 Migration
+- pdf_blobs 테이블 생성 (내용 주소 기반 원본, 참조 카운트)
+- pdf_files.content_hash 컬럼 추가
+- 기존 업로드 파일을 uploads/blobs/ 로 옮기고 중복 파일 정리
+"""
+import os
+from sqlalchemy import text
+from database import engine, SessionLocal
+from models import PDFBlob, PDFFile
+from blob_store import blob_store
+from pdf_text_cache import file_sha256
+
+def migrate():
+    print("=" * 50)
+    print("🔧 PDF 원본 저장소 Migration 시작")
+    print("=" * 50)
+
+    # 1. pdf_blobs 테이블 생성
+    PDFBlob.__table__.create(engine, checkfirst=True)
+    print("✅ pdf_blobs 테이블 생성 완료")
+
+    # 2. content_hash 컬럼 추가
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("""
+                ALTER TABLE pdf_files
+                ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64) REFERENCES pdf_blobs(content_hash);
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_pdf_files_content_hash ON pdf_files (content_hash);
+            """))
+            conn.commit()
+            print("✅ pdf_files 테이블에 content_hash 컬럼 추가 완료")
+        except Exception as e:
+            print(f"⚠️  컬럼 추가 중 오류 (이미 존재할 수 있음): {e}")
+
+    # 3. 기존 파일을 원본 저장소로 이동
+    db = SessionLocal()
+    try:
+        legacy_files = db.query(PDFFile).filter(PDFFile.content_hash.is_(None)).all()
+        moved, missing = 0, 0
+        for pdf in legacy_files:
+            if not os.path.exists(pdf.file_path):
+                missing += 1
+                print(f"⚠️  파일 없음, 건너뜀: {pdf.file_path}")
+                continue
+
+            legacy_path = pdf.file_path
+            content_hash = file_sha256(legacy_path)
+            file_size = os.path.getsize(legacy_path)
+            # 원본을 임시 파일로 옮긴 뒤 저장소에 등록 (중복이면 임시 파일은 삭제됨)
+            tmp_path = blob_store.new_temp_path()
+            os.replace(legacy_path, tmp_path)
+            blob = blob_store.acquire(db, tmp_path, content_hash, file_size)
+            pdf.content_hash = content_hash
+            pdf.file_path = blob.file_path
+            db.commit()
+            moved += 1
+
+        print(f"✅ 기존 PDF {moved}개 이동 완료 (파일 없음: {missing}개)")
+    finally:
+        db.close()
+
+    print("=" * 50)
+    print("🎉 Migration 완료!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+AI 퀴즈 생성 결과 캐시 테이블 추가 Migration
+- quiz_generation_cache: (PDF 내용 해시, 페이지, 문제 수, 유형, 모델, 프롬프트 버전) → 문제 풀
+"""
+
+from sqlalchemy import create_engine
+from database import DATABASE_URL
+from models import QuizGenerationCache
+
+def migrate():
+    """quiz_generation_cache 테이블 생성"""
+    print("=" * 50)
+    print("🔧 퀴즈 생성 캐시 테이블 생성 시작")
+    print("=" * 50)
+
+    engine = create_engine(DATABASE_URL)
+
+    try:
+        QuizGenerationCache.__table__.create(engine, checkfirst=True)
+        print("✅ quiz_generation_cache 테이블 생성 완료")
+    except Exception as e:
+        print(f"❌ quiz_generation_cache 테이블 생성 실패: {e}")
+
+    print("=" * 50)
+    print("🎉 Migration 완료!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    migrate()
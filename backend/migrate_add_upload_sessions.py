@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+분할 업로드 세션 테이블 추가 Migration
+- upload_sessions: 이어받기 가능한 업로드 세션 (offset, 임시 파일, 만료 시각)
+"""
+
+from sqlalchemy import create_engine
+from database import DATABASE_URL
+from models import UploadSession
+
+def migrate():
+    """upload_sessions 테이블 생성"""
+    print("=" * 50)
+    print("🔧 분할 업로드 세션 테이블 생성 시작")
+    print("=" * 50)
+
+    engine = create_engine(DATABASE_URL)
+
+    try:
+        UploadSession.__table__.create(engine, checkfirst=True)
+        print("✅ upload_sessions 테이블 생성 완료")
+    except Exception as e:
+        print(f"❌ upload_sessions 테이블 생성 실패: {e}")
+
+    print("=" * 50)
+    print("🎉 Migration 완료!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,141 @@
+# backend/model_keeper.py
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from llm_client import llm_client, LLM_KEEP_ALIVE
+from llm_gateway import Priority
+from model_routing import model_router
+
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "1") == "1"
+# 미리 올려 둘 모델 목록 (쉼표 구분, 기본은 라우팅 표의 모든 모델)
+OLLAMA_WARMUP_MODELS = [m.strip() for m in os.getenv("OLLAMA_WARMUP_MODELS", ",".join(model_router.models())).split(",") if m.strip()]
+OLLAMA_WARMUP_TIMEOUT = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "300"))  # 큰 모델은 로딩만 수십 초
+OLLAMA_KEEPALIVE_PING_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE_PING_SECONDS", "600"))  # keep_alive(30m)보다 짧게
+OLLAMA_KEEPALIVE_HOURS = os.getenv("OLLAMA_KEEPALIVE_HOURS", "")  # "8-23" 형식 (서버 시간), 비우면 항상
+
+
+def parse_active_hours(spec: str) -> Optional[Tuple[int, int]]:
+    """"8-23" → (8, 23), 빈 문자열이면 None (항상 활성)"""
+    if not spec or not spec.strip():
+        return None
+    try:
+        start_str, end_str = spec.split("-", 1)
+        start, end = int(start_str), int(end_str)
+    except ValueError:
+        print(f"⚠️ OLLAMA_KEEPALIVE_HOURS 형식 오류: {spec} (항상 활성으로 처리)")
+        return None
+    if not (0 <= start <= 23 and 0 <= end <= 23):
+        print(f"⚠️ OLLAMA_KEEPALIVE_HOURS 범위 오류: {spec} (항상 활성으로 처리)")
+        return None
+    return start, end
+
+
+def in_active_hours(hours: Optional[Tuple[int, int]], now: Optional[datetime] = None) -> bool:
+    """현재 시각이 활성 시간대인지 (끝 시각 포함, 22-6처럼 자정을 넘는 범위 지원)"""
+    if hours is None:
+        return True
+    hour = (now or datetime.now()).hour
+    start, end = hours
+    if start <= end:
+        return start <= hour <= end
+    return hour >= start or hour <= end
+
+
+class ModelKeeper:
+    """서버 시작 시 모델을 미리 올리고, 활성 시간대에는 주기적으로 ping해서 메모리에 유지
+
+    Ollama는 keep_alive가 지나면 모델을 내리므로 한참 쉬었다가 들어온 첫 채팅이
+    모델 로딩 시간까지 기다리다 타임아웃 나기 쉽다. 빈 프롬프트 요청은 모델만 올리고
+    생성은 하지 않으므로 load_duration이 곧 모델 로딩 시간이다.
+    ping은 IDLE 우선순위라 실제 요청이 있으면 뒤로 밀리고, 최근에 쓰인 모델은 건너뛴다.
+    """
+
+    def __init__(
+        self,
+        models: List[str] = OLLAMA_WARMUP_MODELS,
+        enabled: bool = OLLAMA_WARMUP,
+        interval: float = OLLAMA_KEEPALIVE_PING_SECONDS,
+        active_hours: Optional[Tuple[int, int]] = parse_active_hours(OLLAMA_KEEPALIVE_HOURS)
+    ):
+        self.models = models
+        self.enabled = enabled
+        self.interval = interval
+        self.active_hours = active_hours
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, Dict] = {
+            model: {"warmups": 0, "pings": 0, "failures": 0, "last_load_ms": None, "last_ping_at": None}
+            for model in models
+        }
+
+    def start(self) -> None:
+        """백그라운드 워밍업/keep-alive 루프 시작 (startup 이벤트에서 호출)"""
+        if not self.enabled or not self.models or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _load(self, model: str, kind: str) -> None:
+        stats = self._stats[model]
+        # 실제 요청과 같은 num_ctx로 올려야 첫 요청에서 다시 로딩하지 않음
+        num_ctx = model_router.num_ctx(model)
+        options = {"options": {"num_ctx": num_ctx}} if num_ctx else {}
+        try:
+            data = await llm_client.generate(
+                "",
+                model=model,
+                timeout=OLLAMA_WARMUP_TIMEOUT,
+                priority=Priority.IDLE,
+                keep_alive=LLM_KEEP_ALIVE,
+                **options
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats["failures"] += 1
+            print(f"⚠️ 모델 {kind} 실패: {model} {e}")
+            return
+
+        load_ms = round(data.get("load_duration", 0) / 1e6, 1)
+        stats["warmups" if kind == "워밍업" else "pings"] += 1
+        stats["last_load_ms"] = load_ms
+        stats["last_ping_at"] = datetime.now().isoformat(timespec="seconds")
+        print(f"🔥 모델 {kind}: {model} (로딩 {load_ms}ms)")
+
+    async def _run(self) -> None:
+        for model in self.models:
+            await self._load(model, "워밍업")
+
+        while True:
+            await asyncio.sleep(self.interval)
+            if not in_active_hours(self.active_hours):
+                continue
+            for model in self.models:
+                idle = llm_client.idle_seconds(model)
+                if idle is not None and idle < self.interval:
+                    continue  # 최근 실제 요청이 keep_alive를 이미 연장함
+                await self._load(model, "keep-alive")
+
+    def metrics(self) -> Dict:
+        """모델별 워밍업/ping 현황 + 호출별 로딩/생성 시간"""
+        timings = llm_client.timings()
+        return {
+            "enabled": self.enabled,
+            "keep_alive": LLM_KEEP_ALIVE,
+            "ping_interval_seconds": self.interval,
+            "active_hours": f"{self.active_hours[0]}-{self.active_hours[1]}" if self.active_hours else "always",
+            "active_now": in_active_hours(self.active_hours),
+            "models": {
+                model: {**self._stats.get(model, {}), "latency": timings.get(model)}
+                for model in sorted(set(self.models) | set(timings))
+            },
+        }
+
+    async def shutdown(self) -> None:
+        """keep-alive 루프 중단 (서버 종료 시)"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+# 전역 인스턴스
+model_keeper = ModelKeeper()
@@ -0,0 +1,154 @@
+# backend/model_routing.py
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, replace
+from typing import Deque, Dict, Optional
+from llm_client import DEFAULT_MODEL
+
+LATENCY_SAMPLE_SIZE = 200  # 경로별 지연 시간 백분위 계산용 최근 표본 수
+
+# 작은 모델을 쓸 보조 작업 (키워드 추출, 지식 수준 판단)의 기본 모델
+LLM_UTILITY_MODEL = os.getenv("LLM_UTILITY_MODEL", DEFAULT_MODEL)
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """작업별 모델과 생성 옵션 (None이면 Ollama/모델 기본값 사용)"""
+    task: str
+    model: str
+    num_ctx: Optional[int] = None
+    num_predict: Optional[int] = None
+    temperature: Optional[float] = None
+
+    def options(self) -> Dict:
+        return {
+            key: value
+            for key, value in (
+                ("num_ctx", self.num_ctx),
+                ("num_predict", self.num_predict),
+                ("temperature", self.temperature),
+            )
+            if value is not None
+        }
+
+    def params(self) -> Dict:
+        """llm_client.generate/stream_generate에 넘길 model, options"""
+        options = self.options()
+        return {"model": self.model, "options": options} if options else {"model": self.model}
+
+
+# 기본 라우팅 표 (환경 변수 LLM_ROUTE_<작업>_<항목>으로 덮어씀)
+DEFAULT_ROUTES: Dict[str, ModelRoute] = {
+    # 학생이 읽는 튜터링 답변 (스트리밍), 방별 context 재사용 한도가 num_ctx에서 정해지므로 명시
+    # (같은 모델을 쓰는 다른 경로와 워밍업도 unify_num_ctx로 같은 값을 보냄)
+    "chat": ModelRoute("chat", DEFAULT_MODEL, num_ctx=8192),
+    # 짧은 키워드 한 줄
+    "keyword": ModelRoute("keyword", LLM_UTILITY_MODEL, num_predict=32, temperature=0.0),
+    # "지식수준: N / 이유: 1-2줄"
+    "judgment": ModelRoute("judgment", LLM_UTILITY_MODEL, num_predict=160),
+    # 긴 JSON 문제 목록
+    "quiz": ModelRoute("quiz", DEFAULT_MODEL, num_predict=8192, temperature=0.7),
+}
+
+
+def _env_number(name: str, cast, default):
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    if raw.strip().lower() == "default":
+        return None  # 옵션을 보내지 않음 (모델 기본값)
+    try:
+        return cast(raw)
+    except ValueError:
+        print(f"⚠️ {name} 값 오류: {raw} (기본값 사용)")
+        return default
+
+
+def load_route(route: ModelRoute) -> ModelRoute:
+    """LLM_ROUTE_KEYWORD_MODEL=qwen2.5:1.5b, LLM_ROUTE_KEYWORD_NUM_CTX=2048 ... 형식으로 덮어쓴 경로"""
+    prefix = f"LLM_ROUTE_{route.task.upper()}_"
+    return ModelRoute(
+        task=route.task,
+        model=os.getenv(prefix + "MODEL", route.model),
+        num_ctx=_env_number(prefix + "NUM_CTX", int, route.num_ctx),
+        num_predict=_env_number(prefix + "NUM_PREDICT", int, route.num_predict),
+        temperature=_env_number(prefix + "TEMPERATURE", float, route.temperature),
+    )
+
+
+def unify_num_ctx(routes: Dict[str, ModelRoute]) -> Dict[str, ModelRoute]:
+    """같은 모델을 쓰는 경로의 num_ctx를 하나로 맞춤 (그중 가장 큰 값)
+
+    Ollama는 요청의 num_ctx가 바뀌면 모델 러너를 다시 올리고 KV 캐시를 버리므로,
+    채팅과 판단/퀴즈가 같은 모델을 다른 num_ctx로 번갈아 부르면 매번 재로딩된다.
+    """
+    by_model: Dict[str, int] = {}
+    for route in routes.values():
+        if route.num_ctx:
+            if route.model in by_model and by_model[route.model] != route.num_ctx:
+                print(f"⚠️ {route.model}의 num_ctx가 경로마다 다름 → 가장 큰 값으로 통일")
+            by_model[route.model] = max(by_model.get(route.model, 0), route.num_ctx)
+    return {task: replace(route, num_ctx=by_model.get(route.model)) for task, route in routes.items()}
+
+
+class ModelRouter:
+    """작업 → (모델, num_ctx, num_predict, temperature) 라우팅 + 경로별 품질/지연 집계
+
+    품질은 작업마다 호출 측이 판단한다 (키워드가 비지 않음, 지식 수준 파싱 성공,
+    검증 통과 문제 있음, 스트림 정상 종료). 같은 작업을 다른 모델로 바꿔 가며
+    /api/llm/routes에서 성공률과 지연 시간을 비교할 수 있다.
+    """
+
+    def __init__(self, routes: Dict[str, ModelRoute] = DEFAULT_ROUTES):
+        self.routes = unify_num_ctx({task: load_route(route) for task, route in routes.items()})
+        self._stats: Dict[str, Dict[str, float]] = {
+            task: {"calls": 0, "ok": 0, "latency_total": 0.0} for task in self.routes
+        }
+        self._samples: Dict[str, Deque[float]] = {
+            task: deque(maxlen=LATENCY_SAMPLE_SIZE) for task in self.routes
+        }
+
+    def route(self, task: str) -> ModelRoute:
+        return self.routes[task]
+
+    def params(self, task: str) -> Dict:
+        return self.routes[task].params()
+
+    def num_ctx(self, model: str) -> Optional[int]:
+        """모델에 맞춘 num_ctx (워밍업/ping도 같은 값으로 보내야 재로딩이 없음)"""
+        for route in self.routes.values():
+            if route.model == model:
+                return route.num_ctx
+        return None
+
+    def models(self):
+        """라우팅 표에 있는 모델 목록 (중복 제거, 워밍업 대상)"""
+        return sorted({route.model for route in self.routes.values()})
+
+    def record(self, task: str, started: float, ok: bool) -> None:
+        """호출 결과 기록 (started: time.monotonic() 시작 시각)"""
+        latency = time.monotonic() - started
+        stats = self._stats[task]
+        stats["calls"] += 1
+        stats["ok"] += 1 if ok else 0
+        stats["latency_total"] += latency
+        self._samples[task].append(latency)
+
+    def metrics(self) -> Dict:
+        result = {}
+        for task, route in self.routes.items():
+            stats = self._stats[task]
+            calls = stats["calls"]
+            samples = sorted(self._samples[task])
+            result[task] = {
+                **asdict(route),
+                "calls": calls,
+                "success_rate": round(stats["ok"] / calls, 3) if calls else None,
+                "avg_latency_ms": round(stats["latency_total"] / calls * 1000, 1) if calls else 0.0,
+                "p95_latency_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 1) if samples else 0.0,
+            }
+        return result
+
+# 전역 인스턴스
+model_router = ModelRouter()
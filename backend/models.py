@@ -84,9 +84,57 @@ class PDFFile(Base):
     file_size = Column(Integer, nullable=False)  # 바이트 단위
     page_count = Column(Integer, nullable=True)  # PDF 페이지 수
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    content_hash = Column(String(64), ForeignKey("pdf_blobs.content_hash"), nullable=True, index=True)  # 원본 SHA-256
     
     user = relationship("User", back_populates="pdf_files")
     folder = relationship("Folder", back_populates="pdf_files")
+    blob = relationship("PDFBlob", back_populates="pdf_files")
+
+class PDFBlob(Base):
+    """PDF 원본 저장소 (내용 주소 기반, 동일 파일은 한 번만 저장)"""
+    __tablename__ = "pdf_blobs"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 hex
+    file_path = Column(String(500), nullable=False)  # uploads/blobs/{hash[:2]}/{hash}.pdf
+    file_size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)  # 참조하는 PDFFile 수
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    pdf_files = relationship("PDFFile", back_populates="blob")
+
+class UploadSession(Base):
+    """이어받기 가능한 분할 업로드 세션"""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    folder_id = Column(String, ForeignKey("folders.id"), nullable=True)
+    original_filename = Column(String(255), nullable=False)
+    total_size = Column(BigInteger, nullable=False)  # 전체 파일 크기 (바이트)
+    received_size = Column(BigInteger, default=0, nullable=False)  # 지금까지 받은 바이트 (다음 offset)
+    expected_sha256 = Column(String(64), nullable=True)  # 생성 시 알려준 체크섬 (선택)
+    temp_path = Column(String(500), nullable=False)  # 서버 측 임시 파일
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)  # 마지막 청크 이후 만료 시각
+
+    user = relationship("User")
+
+class QuizGenerationCache(Base):
+    """AI 퀴즈 생성 결과 캐시 (같은 PDF 내용 + 같은 생성 조건이면 재사용)"""
+    __tablename__ = "quiz_generation_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # 아래 조건들의 SHA-256
+    content_hash = Column(String(64), nullable=False, index=True)  # PDF 원본 SHA-256
+    page_selection = Column(String(1000), nullable=False)  # "1-3,7" 형식 (실제 사용한 페이지)
+    concept = Column(String(255), nullable=True)  # 개념 필터
+    num_questions = Column(Integer, nullable=False)
+    question_types = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    questions = Column(Text, nullable=False)  # 누적 문제 풀 (JSON 배열)
+    hit_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 # ========== Planner 모델 ==========
 class Goal(Base):
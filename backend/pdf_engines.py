@@ -0,0 +1,135 @@
+# backend/pdf_engines.py
+import os
+import threading
+from typing import BinaryIO, Dict, List, Type
+
+DEFAULT_ENGINE = "pypdf2"
+
+# PDFium은 스레드 안전하지 않으므로 텍스트 추출과 썸네일 렌더링(pdf_render)이
+# 프로세스 전체에서 이 잠금 하나로 PDFium 호출을 직렬화한다
+PDFIUM_LOCK = threading.Lock()
+
+
+class PDFExtractionEngine:
+    """PDF 텍스트 추출 엔진 인터페이스"""
+
+    name = "base"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """엔진 라이브러리가 설치되어 있는지 확인"""
+        return False
+
+    def extract_pages(self, stream: BinaryIO) -> List[str]:
+        """페이지별 텍스트 반환 (빈 페이지는 빈 문자열)"""
+        raise NotImplementedError
+
+
+class PyPDF2Engine(PDFExtractionEngine):
+    """PyPDF2 엔진 (기존 기본값)"""
+
+    name = "pypdf2"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import PyPDF2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extract_pages(self, stream: BinaryIO) -> List[str]:
+        import PyPDF2
+        pdf_reader = PyPDF2.PdfReader(stream)
+        return [page.extract_text() or "" for page in pdf_reader.pages]
+
+
+class PdfiumEngine(PDFExtractionEngine):
+    """pypdfium2 엔진 (PDFium 기반, 빠르고 한글 슬라이드 추출 품질이 좋음)"""
+
+    name = "pdfium"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import pypdfium2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extract_pages(self, stream: BinaryIO) -> List[str]:
+        import pypdfium2 as pdfium
+        stream.seek(0)
+        with PDFIUM_LOCK:
+            document = pdfium.PdfDocument(stream)
+            try:
+                pages = []
+                for page in document:
+                    textpage = page.get_textpage()
+                    pages.append(textpage.get_text_range().replace("\r\n", "\n"))
+                    textpage.close()
+                    page.close()
+                return pages
+            finally:
+                document.close()
+
+
+class PdfMinerEngine(PDFExtractionEngine):
+    """pdfminer.six 엔진 (순수 파이썬, 레이아웃 분석 기반)"""
+
+    name = "pdfminer"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import pdfminer  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extract_pages(self, stream: BinaryIO) -> List[str]:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        stream.seek(0)
+        pages = []
+        for layout in extract_pages(stream):
+            texts = [element.get_text() for element in layout if isinstance(element, LTTextContainer)]
+            pages.append("".join(texts))
+        return pages
+
+
+ENGINES: Dict[str, Type[PDFExtractionEngine]] = {
+    PyPDF2Engine.name: PyPDF2Engine,
+    PdfiumEngine.name: PdfiumEngine,
+    PdfMinerEngine.name: PdfMinerEngine,
+}
+
+
+def get_engine(name: str) -> PDFExtractionEngine:
+    """이름으로 추출 엔진 생성 (미설치 시 ValueError)"""
+    engine_cls = ENGINES.get(name)
+    if engine_cls is None:
+        raise ValueError(f"알 수 없는 PDF 추출 엔진: {name} (사용 가능: {', '.join(ENGINES)})")
+    if not engine_cls.is_available():
+        raise ValueError(f"PDF 추출 엔진 '{name}'의 라이브러리가 설치되어 있지 않습니다")
+    return engine_cls()
+
+
+def available_engines() -> List[str]:
+    """설치된 추출 엔진 이름 목록"""
+    return [name for name, engine_cls in ENGINES.items() if engine_cls.is_available()]
+
+
+def load_configured_engine() -> PDFExtractionEngine:
+    """PDF_EXTRACT_ENGINE 환경 변수로 배포별 엔진 선택 (실패 시 PyPDF2)"""
+    name = os.getenv("PDF_EXTRACT_ENGINE", DEFAULT_ENGINE).strip().lower()
+    try:
+        engine = get_engine(name)
+    except ValueError as e:
+        print(f"⚠️ {e}, {DEFAULT_ENGINE} 엔진 사용")
+        engine = get_engine(DEFAULT_ENGINE)
+    print(f"📄 PDF 추출 엔진: {engine.name}")
+    return engine
+
+# 전역 인스턴스
+pdf_engine = load_configured_engine()
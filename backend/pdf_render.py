@@ -0,0 +1,82 @@
+# backend/pdf_render.py
+import os
+from typing import Tuple
+from pdf_engines import PDFIUM_LOCK
+
+RENDER_CACHE_DIR = os.getenv("PDF_RENDER_CACHE_DIR", "render_cache")
+THUMBNAIL_WIDTHS = (160, 320, 640)  # 캐시가 무한히 늘지 않도록 허용하는 폭만 사용
+THUMBNAIL_QUALITY = 70  # JPEG 품질
+
+
+class RenderUnavailableError(Exception):
+    """페이지 렌더링 라이브러리(pypdfium2, Pillow)가 설치되어 있지 않음"""
+
+
+def snap_width(width: int) -> int:
+    """요청 폭을 허용된 썸네일 폭 중 가장 가까운 큰 값으로 맞춤"""
+    for allowed in THUMBNAIL_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return THUMBNAIL_WIDTHS[-1]
+
+
+class PageRenderCache:
+    """PDF 페이지 썸네일 렌더링 + 디스크 캐시 ((content_hash, page, width) 기준)"""
+
+    def __init__(self, cache_dir: str = RENDER_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def thumbnail_path(self, content_hash: str, page: int, width: int) -> str:
+        return os.path.join(self.cache_dir, content_hash[:2], content_hash, f"p{page}_w{width}.jpg")
+
+    def get_thumbnail(self, pdf_path: str, content_hash: str, page: int, width: int) -> Tuple[str, bool]:
+        """썸네일 파일 경로 반환 (캐시 미스 시 렌더링)
+
+        Args:
+            page: 1부터 시작하는 페이지 번호
+            width: snap_width()로 맞춘 폭
+
+        Returns:
+            (썸네일 경로, 캐시 적중 여부)
+        """
+        path = self.thumbnail_path(content_hash, page, width)
+        if os.path.exists(path):
+            return path, True
+
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            raise RenderUnavailableError("pypdfium2가 설치되어 있지 않습니다")
+
+        # 텍스트 추출(PdfiumEngine)과 같은 프로세스 전역 잠금으로 PDFium 호출 직렬화
+        with PDFIUM_LOCK:
+            if os.path.exists(path):
+                return path, True
+
+            document = pdfium.PdfDocument(pdf_path)
+            try:
+                if page < 1 or page > len(document):
+                    raise IndexError(f"페이지 범위를 벗어났습니다: {page}")
+                pdf_page = document[page - 1]
+                scale = width / pdf_page.get_width()
+                bitmap = pdf_page.render(scale=scale)
+                try:
+                    image = bitmap.to_pil()
+                except ImportError:
+                    raise RenderUnavailableError("Pillow가 설치되어 있지 않습니다")
+                bitmap.close()
+                pdf_page.close()
+            finally:
+                document.close()
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            image.convert("RGB").save(tmp_path, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+            os.replace(tmp_path, path)
+
+        print(f"🖼️ 썸네일 렌더링: {content_hash[:12]} p{page} w{width}")
+        return path, False
+
+# 전역 인스턴스
+page_render_cache = PageRenderCache()
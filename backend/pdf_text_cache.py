@@ -0,0 +1,110 @@
+# backend/pdf_text_cache.py
+import hashlib
+import json
+import os
+from typing import List, Optional
+from pdf_engines import PDFExtractionEngine, pdf_engine
+
+try:
+    import zstandard
+except ImportError:  # zstd 압축은 선택 사항
+    zstandard = None
+
+TEXT_CACHE_DIR = os.getenv("PDF_TEXT_CACHE_DIR", "text_cache")
+CACHE_FORMAT_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def file_sha256(pdf_path: str) -> str:
+    """파일 내용의 SHA-256 해시 계산"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PDFTextCache:
+    """PDF 추출 텍스트 캐시 (파일 SHA-256 기반 페이지별 sidecar)
+
+    sidecar 형식은 JSON-lines: 첫 줄은 헤더, 이후 한 줄에 한 페이지 텍스트.
+    zstandard가 설치되어 있으면 .jsonl.zst로 압축 저장한다.
+    추출 결과는 엔진마다 다르므로 엔진 이름별 디렉토리에 따로 저장한다.
+    """
+
+    def __init__(self, cache_dir: str = TEXT_CACHE_DIR, engine: PDFExtractionEngine = pdf_engine):
+        self.cache_dir = cache_dir
+        self.engine = engine
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _sidecar_path(self, content_hash: str, compressed: bool) -> str:
+        suffix = ".jsonl.zst" if compressed else ".jsonl"
+        return os.path.join(self.cache_dir, self.engine.name, content_hash[:2], content_hash + suffix)
+
+    def load(self, content_hash: str) -> Optional[List[str]]:
+        """캐시된 페이지 텍스트 조회 (없으면 None)"""
+        for compressed in (True, False):
+            path = self._sidecar_path(content_hash, compressed)
+            if not os.path.exists(path):
+                continue
+            if compressed and zstandard is None:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                if compressed:
+                    raw = zstandard.ZstdDecompressor().decompress(raw)
+                # splitlines()는 페이지 텍스트 안의 U+0085/U+2028/U+2029에서도 나누므로 "\n"으로만 나눔
+                lines = raw.decode('utf-8').split("\n")
+                if lines and lines[-1] == "":
+                    lines.pop()
+                header = json.loads(lines[0])
+                if header.get("version") != CACHE_FORMAT_VERSION:
+                    return None
+                pages = [json.loads(line) for line in lines[1:]]
+                if len(pages) != header.get("page_count"):
+                    return None
+                return pages
+            except Exception as e:
+                print(f"⚠️ 텍스트 캐시 읽기 오류 ({content_hash[:12]}): {e}")
+                return None
+        return None
+
+    def save(self, content_hash: str, pages: List[str]) -> None:
+        """페이지 텍스트를 sidecar 파일로 저장 (임시 파일 후 교체)"""
+        header = {
+            "version": CACHE_FORMAT_VERSION,
+            "sha256": content_hash,
+            "engine": self.engine.name,
+            "page_count": len(pages)
+        }
+        lines = [json.dumps(header)] + [json.dumps(page, ensure_ascii=False) for page in pages]
+        raw = ("\n".join(lines) + "\n").encode('utf-8')
+
+        compressed = zstandard is not None
+        if compressed:
+            raw = zstandard.ZstdCompressor(level=3).compress(raw)
+
+        path = self._sidecar_path(content_hash, compressed)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+
+    def get_pages(self, pdf_path: str, content_hash: Optional[str] = None) -> List[str]:
+        """파일 경로로 페이지 텍스트 조회 (캐시 미스 시 한 번만 파싱)"""
+        content_hash = content_hash or file_sha256(pdf_path)
+        pages = self.load(content_hash)
+        if pages is not None:
+            print(f"⚡ 텍스트 캐시 적중: {content_hash[:12]} ({len(pages)}페이지)")
+            return pages
+
+        with open(pdf_path, 'rb') as f:
+            pages = self.engine.extract_pages(f)
+        self.save(content_hash, pages)
+        print(f"📄 텍스트 캐시 저장: {content_hash[:12]} ({len(pages)}페이지)")
+        return pages
+
+# 전역 인스턴스
+pdf_text_cache = PDFTextCache()
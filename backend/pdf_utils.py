@@ -1,72 +1,119 @@
 # backend/pdf_utils.py
-import PyPDF2
-from typing import Optional, Union
-from io import BytesIO
+from typing import List, Optional, Tuple
 
-def extract_text_from_pdf(pdf_file: Union[BytesIO, any]) -> Optional[str]:
+
+def parse_page_ranges(spec: Optional[str], page_count: int) -> List[int]:
     """
-    PDF 파일에서 텍스트 추출
+    페이지 범위 문자열을 페이지 번호 목록으로 변환
     
     Args:
-        pdf_file: BytesIO 객체 또는 UploadFile 객체
+        spec: "1-3,7,10-12" 형식 (1부터 시작, None/빈 문자열이면 전체)
+        page_count: 전체 페이지 수
         
     Returns:
-        추출된 텍스트 또는 None
-    """
-    try:
-        # BytesIO 객체인 경우
-        if isinstance(pdf_file, BytesIO):
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-        else:
-            # UploadFile 객체인 경우
-            pdf_reader = PyPDF2.PdfReader(pdf_file.file)
-        
-        # 모든 페이지의 텍스트 추출
-        text_content = []
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text = page.extract_text()
-            if text:
-                text_content.append(text)
-        
-        # 텍스트 결합
-        full_text = "\n".join(text_content)
-        
-        # 빈 텍스트 체크
-        if not full_text.strip():
-            return None
-            
-        print(f"✅ PDF 추출 완료: {len(full_text)} 글자")
-        return full_text
+        정렬된 페이지 번호 목록 (1부터 시작)
         
-    except Exception as e:
-        print(f"❌ PDF 텍스트 추출 오류: {e}")
-        return None
+    Raises:
+        ValueError: 형식이 잘못되었거나 범위를 벗어난 경우
+    """
+    if not spec or not spec.strip():
+        return list(range(1, page_count + 1))
+    
+    pages = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start_str, end_str = part.split('-', 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"잘못된 페이지 범위: {part}")
+        if start < 1 or end > page_count or start > end:
+            raise ValueError(f"잘못된 페이지 범위: {part} (전체 {page_count}페이지)")
+        pages.update(range(start, end + 1))
+    
+    if not pages:
+        raise ValueError(f"잘못된 페이지 범위: {spec}")
+    return sorted(pages)
+
+
+def _clip_chunk(text: str, max_chars: int) -> str:
+    """청크를 최대 글자 수로 자르되 가능하면 문장/줄 경계에서 자름"""
+    if len(text) <= max_chars:
+        return text
+    clipped = text[:max_chars]
+    boundary = max(clipped.rfind('.'), clipped.rfind('\n'))
+    if boundary > max_chars // 2:
+        return clipped[:boundary + 1]
+    return clipped
+
+
+def _evenly_spaced(count: int, k: int) -> List[int]:
+    """0..count-1 에서 문서 전체에 고르게 퍼진 k개 인덱스"""
+    if k >= count:
+        return list(range(count))
+    if k == 1:
+        return [count // 2]
+    return sorted({round(i * (count - 1) / (k - 1)) for i in range(k)})
+
 
-def truncate_text(text: str, max_tokens: int = 3000) -> str:
+def select_representative_text(
+    pages: List[Tuple[int, str]],
+    max_tokens: int = 3000,
+    ranked_pages: Optional[List[int]] = None,
+    min_chunk_tokens: int = 100
+) -> str:
     """
-    텍스트를 최대 토큰 수로 제한
+    토큰 예산 안에서 문서를 대표하는 텍스트 선택
     대략 1 토큰 = 4자로 계산
     
+    앞부분만 남기지 않고, 페이지(청크)를 문서 전체에서 고르게
+    뽑거나 ranked_pages(예: RAG 검색 순위)가 있으면 그 순서로 예산을 채운다.
+    결과는 원래 페이지 순서로 합친다.
+    
     Args:
-        text: 원본 텍스트
+        pages: (페이지 번호, 텍스트) 목록
         max_tokens: 최대 토큰 수
+        ranked_pages: 우선 포함할 페이지 번호 (관련도 순)
+        min_chunk_tokens: 청크 하나에 배정할 최소 토큰 수
         
     Returns:
-        잘린 텍스트
+        선택된 텍스트
     """
+    chunks = [(page_num, text.strip()) for page_num, text in pages if text and text.strip()]
+    if not chunks:
+        return ""
+    
     max_chars = max_tokens * 4
-    if len(text) <= max_chars:
-        return text
+    total_chars = sum(len(text) for _, text in chunks)
+    if total_chars <= max_chars:
+        return "\n".join(text for _, text in chunks)
+    
+    # 예산 안에 들어갈 청크 수 (짧은 페이지가 많으면 더 많이, 최소 청크 크기 보장)
+    avg_chars = max(1, total_chars // len(chunks))
+    k = max(max_chars // avg_chars, max_chars // (min_chunk_tokens * 4))
+    k = max(1, min(len(chunks), k))
     
-    # 문장 단위로 자르기
-    truncated = text[:max_chars]
-    last_period = truncated.rfind('.')
+    if ranked_pages:
+        position = {page_num: idx for idx, (page_num, _) in enumerate(chunks)}
+        ranked = [position[page] for page in dict.fromkeys(ranked_pages) if page in position]
+        rest = [idx for idx in _evenly_spaced(len(chunks), k) if idx not in set(ranked)]
+        selected = (ranked + rest)[:k]
+    else:
+        selected = _evenly_spaced(len(chunks), k)
     
-    if last_period > 0:
-        truncated_text = truncated[:last_period + 1]
-        print(f"✂️ 텍스트 자름: {len(text)} → {len(truncated_text)} 글자")
-        return truncated_text
+    # 짧은 청크가 남긴 예산은 뒤 청크에 넘겨줌
+    selected_texts = {}
+    remaining = max_chars
+    for order, idx in enumerate(selected):
+        share = remaining // (len(selected) - order)
+        selected_texts[idx] = _clip_chunk(chunks[idx][1], share)
+        remaining -= len(selected_texts[idx]) + 1  # 구분 줄바꿈 포함
     
-    print(f"✂️ 텍스트 자름: {len(text)} → {max_chars} 글자")
-    return truncated
\ No newline at end of file
+    result = "\n".join(selected_texts[idx] for idx in sorted(selected_texts))
+    print(f"🎯 대표 텍스트 선택: {len(chunks)}개 중 {len(selected_texts)}개 청크, {total_chars} → {len(result)} 글자")
+    return result
@@ -0,0 +1,162 @@
+# backend/quiz_cache.py
+import copy
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+import models
+from database import insert_ignore_conflict
+from model_routing import model_router
+from quiz_generator import QUIZ_PROMPT_VERSION, QuestionPool, merge_questions
+
+# PDF 업로드 후 미리 만들어 두는 문제 풀 (문서 전체, 개념 필터 없음)
+QUIZ_POOL_SIZE = int(os.getenv("QUIZ_POOL_SIZE", "20"))
+QUIZ_POOL_LOW_WATER = int(os.getenv("QUIZ_POOL_LOW_WATER", "10"))  # 이보다 줄면 백그라운드 보충
+
+
+def format_page_ranges(pages: List[int]) -> str:
+    """[1, 2, 3, 7] → "1-3,7" (parse_page_ranges의 역)"""
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ",".join(f"{start}-{end}" if start != end else str(start) for start, end in ranges)
+
+
+def shuffle_variant(questions: List[Dict], num_questions: int) -> List[Dict]:
+    """문제 풀에서 num_questions개를 무작위로 뽑고 4지선다 선택지 순서도 다시 섞음"""
+    picked = copy.deepcopy(random.sample(questions, min(num_questions, len(questions))))
+    for question in picked:
+        answers = question.get("answers")
+        if answers:
+            random.shuffle(answers)
+            for i, answer in enumerate(answers):
+                answer["answer_order"] = i
+    return picked
+
+
+class QuizResultCache:
+    """AI 퀴즈 생성 결과 DB 캐시
+
+    키는 (PDF 내용 해시, 사용한 페이지, 개념, 문제 수, 유형, 모델, 프롬프트 버전).
+    같은 키로 새로 생성하면(fresh) 결과를 기존 문제 풀에 합쳐 두므로, 풀이 커질수록
+    섞은 변형(shuffle)이 서로 다른 문제 조합을 돌려줄 수 있다.
+
+    num_questions=0 항목은 업로드 직후 미리 만들어 두는 사전 생성 풀이다.
+    요청 문제 수와 무관하게 꺼내 쓰고, 꺼낸 문제는 풀에서 빠진다.
+    """
+
+    def make_key(
+        self,
+        content_hash: str,
+        page_numbers: List[int],
+        num_questions: int,
+        question_types: str,
+        concept: Optional[str] = None,
+        model: Optional[str] = None,
+        prompt_version: str = QUIZ_PROMPT_VERSION
+    ) -> Dict:
+        fields = {
+            "content_hash": content_hash,
+            "page_selection": format_page_ranges(page_numbers),
+            "concept": concept.strip() if concept else None,
+            "num_questions": num_questions,
+            "question_types": question_types,
+            "model": model or model_router.route("quiz").model,  # 퀴즈 경로 모델이 바뀌면 캐시도 분리
+            "prompt_version": prompt_version,
+        }
+        raw = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return {"cache_key": hashlib.sha256(raw.encode("utf-8")).hexdigest(), **fields}
+
+    def get(self, db: Session, key: Dict, num_questions: int, shuffle: bool = False) -> Optional[List[Dict]]:
+        """캐시된 문제 반환 (풀이 목표 수보다 작으면 None)"""
+        entry = db.query(models.QuizGenerationCache).filter(
+            models.QuizGenerationCache.cache_key == key["cache_key"]
+        ).first()
+        if entry is None:
+            return None
+
+        pool = json.loads(entry.questions)
+        if len(pool) < num_questions:
+            return None
+
+        entry.hit_count = (entry.hit_count or 0) + 1
+        db.commit()
+        print(f"⚡ 퀴즈 캐시 적중: {key['content_hash'][:12]} p{key['page_selection']} (풀 {len(pool)}개, {entry.hit_count}회)")
+
+        if shuffle:
+            return shuffle_variant(pool, num_questions)
+        return pool[:num_questions]
+
+    def store(self, db: Session, key: Dict, questions: List[Dict]) -> int:
+        """생성 결과를 문제 풀에 합쳐 저장하고 풀 크기 반환 (새 결과가 앞에 옴)"""
+        # 동시에 같은 키를 처음 저장해도 충돌하지 않도록 빈 행을 먼저 만든 뒤 잠금
+        insert_ignore_conflict(db, models.QuizGenerationCache, {**key, "questions": "[]", "hit_count": 0})
+        entry = db.query(models.QuizGenerationCache).filter(
+            models.QuizGenerationCache.cache_key == key["cache_key"]
+        ).with_for_update().one()
+
+        pool = QuestionPool()
+        pool.extend(questions)
+        pool.extend(json.loads(entry.questions))
+
+        entry.questions = json.dumps(pool.questions, ensure_ascii=False)
+        db.commit()
+        return len(pool)
+
+    def pool_key(self, content_hash: str, page_count: int) -> Dict:
+        """사전 생성 풀 키 (문서 전체 페이지, 혼합 유형)"""
+        return self.make_key(content_hash, list(range(1, page_count + 1)), 0, "mixed")
+
+    def pool_size(self, db: Session, key: Dict) -> int:
+        entry = db.query(models.QuizGenerationCache).filter(
+            models.QuizGenerationCache.cache_key == key["cache_key"]
+        ).first()
+        return len(json.loads(entry.questions)) if entry else 0
+
+    def take_from_pool(
+        self,
+        db: Session,
+        key: Dict,
+        num_questions: int,
+        question_types: str = "mixed",
+        shuffle: bool = False
+    ) -> Optional[Tuple[List[Dict], int]]:
+        """사전 생성 풀에서 유형에 맞는 문제를 꺼냄
+
+        Returns:
+            (꺼낸 문제, 풀에 남은 문제 수), 풀이 모자라면 None
+        """
+        entry = db.query(models.QuizGenerationCache).filter(
+            models.QuizGenerationCache.cache_key == key["cache_key"]
+        ).with_for_update().first()
+        if entry is None:
+            return None
+
+        pool = json.loads(entry.questions)
+        candidates = [
+            question for question in pool
+            if question_types == "mixed" or question["question_type"] == question_types
+        ]
+        if shuffle:
+            random.shuffle(candidates)
+
+        picked = merge_questions([candidates], num_questions, question_types)
+        if len(picked) < num_questions:
+            db.rollback()
+            return None
+
+        picked_ids = {id(question) for question in picked}
+        remaining = [question for question in pool if id(question) not in picked_ids]
+        entry.questions = json.dumps(remaining, ensure_ascii=False)
+        entry.hit_count = (entry.hit_count or 0) + 1
+        db.commit()
+        print(f"⚡ 사전 생성 풀 사용: {key['content_hash'][:12]} {len(picked)}문제 (남은 {len(remaining)}개)")
+        return picked, len(remaining)
+
+# 전역 인스턴스
+quiz_result_cache = QuizResultCache()
@@ -0,0 +1,97 @@
+# backend/quiz_pregenerate.py
+import asyncio
+import os
+from typing import Set
+import models
+from database import SessionLocal
+from llm_gateway import Priority
+from pdf_text_cache import pdf_text_cache
+from pdf_utils import select_representative_text
+from quiz_cache import quiz_result_cache, QUIZ_POOL_SIZE
+from quiz_generator import generate_quiz_from_text, QUIZ_SOURCE_MAX_TOKENS
+
+QUIZ_PREGENERATE = os.getenv("QUIZ_PREGENERATE", "0") == "1"  # 업로드 후 퀴즈 풀 사전 생성 (선택 단계)
+
+
+class QuizPoolPregenerator:
+    """PDF 업로드(인덱싱) 뒤 남는 LLM 용량으로 문제 풀을 미리 채우는 백그라운드 작업
+
+    LLM 게이트웨이의 IDLE 우선순위로 실행되므로 채팅/판단/사용자 퀴즈 요청이
+    있으면 항상 뒤로 밀린다. 같은 PDF 내용에 대한 작업은 한 번에 하나만 돈다.
+    """
+
+    def __init__(self, enabled: bool = QUIZ_PREGENERATE):
+        self.enabled = enabled
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, content_hash: str, pdf_path: str) -> bool:
+        """풀 채우기 작업 예약 (이미 진행 중이거나 비활성화면 False)"""
+        if not self.enabled or not content_hash or content_hash in self._running:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        self._running.add(content_hash)
+        task = loop.create_task(self._fill_pool(content_hash, pdf_path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _fill_pool(self, content_hash: str, pdf_path: str) -> None:
+        db = SessionLocal()
+        try:
+            pages = await asyncio.to_thread(pdf_text_cache.get_pages, pdf_path, content_hash)
+            if not pages:
+                return
+
+            key = quiz_result_cache.pool_key(content_hash, len(pages))
+            shortfall = QUIZ_POOL_SIZE - quiz_result_cache.pool_size(db, key)
+            if shortfall <= 0:
+                return
+
+            text = select_representative_text(list(enumerate(pages, 1)), max_tokens=QUIZ_SOURCE_MAX_TOKENS)
+            if not text:
+                return
+
+            print(f"🌙 퀴즈 풀 사전 생성 시작: {content_hash[:12]} ({shortfall}문제)")
+            questions = await generate_quiz_from_text(
+                text=text,
+                num_questions=shortfall,
+                question_types="mixed",
+                priority=Priority.IDLE
+            )
+            if not questions:
+                return
+
+            # 생성하는 동안 PDF가 모두 삭제됐으면 저장하지 않음. 원본 행을 잠가 두면
+            # blob_store.release()(같은 행을 잠금)와 순서가 정해져 고아 캐시가 남지 않는다.
+            blob = db.query(models.PDFBlob).filter(
+                models.PDFBlob.content_hash == content_hash
+            ).with_for_update().first()
+            if blob is None:
+                print(f"🌙 퀴즈 풀 사전 생성 폐기 (PDF 삭제됨): {content_hash[:12]}")
+                return
+
+            pool_size = quiz_result_cache.store(db, key, questions)
+            print(f"🌙 퀴즈 풀 사전 생성 완료: {content_hash[:12]} (풀 {pool_size}개)")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ 퀴즈 풀 사전 생성 실패: {content_hash[:12]} {e}")
+        finally:
+            db.close()
+            self._running.discard(content_hash)
+
+    async def shutdown(self) -> None:
+        """진행 중인 사전 생성 작업 취소 (서버 종료 시)"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+# 전역 인스턴스
+quiz_pool_pregenerator = QuizPoolPregenerator()
@@ -2,7 +2,6 @@
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
-import PyPDF2
 from typing import List, Dict
 import os
 
@@ -10,9 +9,9 @@ import os
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
-import PyPDF2
 from typing import List, Dict, Optional
 import os
+from pdf_text_cache import pdf_text_cache
 
 class RAGSystem:
     """ChromaDB 기반 RAG 시스템 (User 기반, PDF별 구분)"""
@@ -38,22 +37,19 @@ class RAGSystem:
             collection = self.client.create_collection(collection_name)
         return collection
     
-    def extract_text_from_pdf(self, pdf_path: str) -> List[Dict[str, str]]:
-        """PDF에서 텍스트 추출 (페이지별)"""
+    def extract_text_from_pdf(self, pdf_path: str, content_hash: Optional[str] = None) -> List[Dict[str, str]]:
+        """PDF에서 텍스트 추출 (페이지별, 텍스트 캐시 사용)"""
         chunks = []
         
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                text = page.extract_text()
-                
-                if text.strip():
-                    chunks.append({
-                        'text': text,
-                        'page': page_num + 1,
-                        'metadata': f'Page {page_num + 1}'
-                    })
+        pages = pdf_text_cache.get_pages(pdf_path, content_hash)
+        
+        for page_num, text in enumerate(pages):
+            if text.strip():
+                chunks.append({
+                    'text': text,
+                    'page': page_num + 1,
+                    'metadata': f'Page {page_num + 1}'
+                })
         
         print(f"📄 PDF에서 {len(chunks)}개 페이지 추출 완료")
         return chunks
@@ -63,14 +59,15 @@ class RAGSystem:
         user_id: str, 
         pdf_id: str, 
         pdf_path: str, 
-        filename: str
+        filename: str,
+        content_hash: Optional[str] = None
     ) -> bool:
         """PDF 내용을 ChromaDB에 저장 (PDF별로 구분)"""
         try:
             collection = self.get_or_create_collection(user_id)
             
             # PDF 텍스트 추출
-            chunks = self.extract_text_from_pdf(pdf_path)
+            chunks = self.extract_text_from_pdf(pdf_path, content_hash)
             
             if not chunks:
                 print("❌ PDF에서 텍스트를 추출할 수 없습니다")
@@ -0,0 +1,36 @@
+# backend/room_connections.py
+from collections import defaultdict
+from typing import Dict, Set
+from fastapi import WebSocket
+
+
+class RoomConnectionRegistry:
+    """채팅방별로 열려 있는 WebSocket 연결 목록 (백그라운드 작업 결과 푸시용)"""
+
+    def __init__(self):
+        self._connections: Dict[str, Set[WebSocket]] = defaultdict(set)
+
+    def register(self, room_id: str, websocket: WebSocket) -> None:
+        self._connections[room_id].add(websocket)
+
+    def unregister(self, room_id: str, websocket: WebSocket) -> None:
+        connections = self._connections.get(room_id)
+        if connections is None:
+            return
+        connections.discard(websocket)
+        if not connections:
+            del self._connections[room_id]
+
+    async def broadcast(self, room_id: str, message: Dict) -> int:
+        """채팅방의 모든 연결에 전송, 전송한 연결 수 반환 (끊긴 연결은 정리)"""
+        sent = 0
+        for websocket in list(self._connections.get(room_id, ())):
+            try:
+                await websocket.send_json(message)
+                sent += 1
+            except Exception:
+                self.unregister(room_id, websocket)
+        return sent
+
+# 전역 인스턴스
+room_connections = RoomConnectionRegistry()
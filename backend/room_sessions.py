@@ -0,0 +1,95 @@
+# backend/room_sessions.py
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from model_routing import model_router
+
+ROOM_SESSION_TTL_SECONDS = float(os.getenv("ROOM_SESSION_TTL_SECONDS", "1800"))  # Ollama keep_alive와 맞춤
+# 다음 턴 프롬프트(RAG 자료 포함)와 답변을 위해 num_ctx에서 비워 둘 토큰 수
+ROOM_CONTEXT_RESERVE_TOKENS = int(os.getenv("ROOM_CONTEXT_RESERVE_TOKENS", "3072"))
+OLLAMA_DEFAULT_NUM_CTX = 2048  # 채팅 경로에 num_ctx가 없을 때 가정할 값 (Ollama 기본값 중 가장 작은 값)
+MAX_ROOM_SESSIONS = int(os.getenv("MAX_ROOM_SESSIONS", "500"))
+
+
+def context_token_limit(num_ctx: Optional[int] = None) -> int:
+    """재사용할 context의 최대 토큰 수 (채팅 경로 num_ctx - 여유분)
+
+    저장된 context + 새 턴이 num_ctx를 넘으면 Ollama가 앞부분(시스템 프롬프트)부터 잘라내므로
+    한도를 넘은 context는 버리고 전체 프롬프트로 다시 시작한다.
+    """
+    num_ctx = num_ctx or model_router.route("chat").num_ctx or OLLAMA_DEFAULT_NUM_CTX
+    return num_ctx - min(ROOM_CONTEXT_RESERVE_TOKENS, num_ctx // 2)
+
+
+def session_signature(phase: str, pdf_id: Optional[str], concept: Optional[str], system_prompt: str) -> str:
+    """컨텍스트를 이어 써도 되는 조건 (단계, PDF, 개념, 시스템 프롬프트가 모두 같을 때)"""
+    raw = "\x1f".join([phase, pdf_id or "", concept or "", system_prompt])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RoomSession:
+    signature: str
+    context: List[int]
+    turns: int = 0
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class RoomSessionStore:
+    """채팅방별 Ollama context(이전 턴까지의 토큰 상태) 보관
+
+    같은 단계/PDF/개념/시스템 프롬프트로 이어지는 턴은 저장된 context와 새 사용자
+    메시지만 보내므로 Ollama가 이미 계산한 접두부(KV 캐시)를 다시 prefill하지 않는다.
+    조건이 바뀌거나, TTL이 지나거나, 토큰 수가 한도를 넘으면 버리고 전체 프롬프트로 시작한다.
+    """
+
+    def __init__(self, ttl: float = ROOM_SESSION_TTL_SECONDS, max_tokens: Optional[int] = None):
+        self.ttl = ttl
+        self.max_tokens = max_tokens or context_token_limit()
+        self._sessions: "OrderedDict[str, RoomSession]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, room_id: str, signature: str) -> Optional[List[int]]:
+        session = self._sessions.get(room_id)
+        if session is None:
+            self.stats["misses"] += 1
+            return None
+
+        if (
+            session.signature != signature
+            or time.monotonic() - session.updated_at > self.ttl
+            or len(session.context) > self.max_tokens
+        ):
+            self.invalidate(room_id)
+            self.stats["misses"] += 1
+            return None
+
+        self._sessions.move_to_end(room_id)
+        self.stats["hits"] += 1
+        return session.context
+
+    def update(self, room_id: str, signature: str, context: Optional[List[int]]) -> None:
+        """턴이 끝난 뒤 Ollama가 돌려준 context 저장"""
+        if not context:
+            self.invalidate(room_id)
+            return
+
+        previous = self._sessions.get(room_id)
+        turns = previous.turns + 1 if previous and previous.signature == signature else 1
+        self._sessions[room_id] = RoomSession(signature=signature, context=context, turns=turns)
+        self._sessions.move_to_end(room_id)
+        while len(self._sessions) > MAX_ROOM_SESSIONS:
+            self._sessions.popitem(last=False)
+
+    def invalidate(self, room_id: str) -> None:
+        if self._sessions.pop(room_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def metrics(self) -> Dict:
+        return {**self.stats, "active_sessions": len(self._sessions), "max_context_tokens": self.max_tokens}
+
+# 전역 인스턴스
+room_sessions = RoomSessionStore()
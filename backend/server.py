@@ -1,9 +1,9 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Header
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from database import engine, get_db, SessionLocal
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
@@ -13,6 +13,7 @@ import models
 import socket
 import asyncio
 import os
+import time
 
 
 from feynman_prompts import LearningPhase, feynman_engine
@@ -21,13 +22,40 @@ from learning_flow import flow_manager
 from auth import get_password_hash, verify_password, create_access_token, decode_access_token
 from fastapi import File, UploadFile, Form
 from rag_system import rag_system
+from llm_client import llm_client, LLMError
+from llm_gateway import llm_gateway, Priority
+from keyword_extractor import concept_keyword_extractor
+from knowledge_judgment import knowledge_judgment_jobs
+from room_connections import room_connections
+from room_sessions import room_sessions, session_signature
+from model_keeper import model_keeper
+from model_routing import model_router
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 
 # Quiz 관련 import
-from quiz_generator import generate_quiz_from_text
-from pdf_utils import extract_text_from_pdf, truncate_text
+from quiz_generator import (
+    generate_quiz_from_text,
+    generate_quiz_sectioned,
+    stream_quiz_questions,
+    QuizGenerationCancelled,
+    QUIZ_SOURCE_MAX_TOKENS,
+    quiz_metrics
+)
+from quiz_cache import quiz_result_cache, QUIZ_POOL_LOW_WATER
+from quiz_pregenerate import quiz_pool_pregenerator
+from pdf_utils import parse_page_ranges, select_representative_text
+from pdf_text_cache import pdf_text_cache, file_sha256, CACHE_FORMAT_VERSION
+from pdf_render import page_render_cache, snap_width, RenderUnavailableError
+from blob_store import blob_store, UploadTooLargeError, CHUNK_SIZE
+from upload_sessions import (
+    upload_session_manager,
+    UploadOffsetMismatchError,
+    UploadIncompleteError,
+    UploadIntegrityError,
+    UploadBusyError
+)
 from datetime import timedelta
-from io import BytesIO
 
 # JWT 인증을 위한 보안 스키마
 security = HTTPBearer()
@@ -67,6 +95,29 @@ if not os.path.exists("uploads"):
 
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+# ========== 서버 수명 주기 ==========
+@app.on_event("startup")
+async def on_startup():
+    """서버 시작: LLM 클라이언트 연결 풀 생성, 모델 워밍업, 방치된 분할 업로드 세션 정리"""
+    await llm_client.start()
+    model_keeper.start()
+
+    db = SessionLocal()
+    try:
+        upload_session_manager.cleanup_expired(db)
+    except Exception as e:
+        print(f"⚠️ 업로드 세션 정리 오류: {e}")
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """서버 종료: 백그라운드 LLM 작업 중단 + LLM 클라이언트 연결 풀 정리"""
+    await model_keeper.shutdown()
+    await knowledge_judgment_jobs.shutdown()
+    await quiz_pool_pregenerator.shutdown()
+    await llm_client.close()
+
 # ========== 기존 Pydantic 모델 ==========
 class ChatRoomCreate(BaseModel):
     title: str
@@ -165,6 +216,7 @@ class PDFFileResponse(BaseModel):
     file_size: int
     page_count: Optional[int]
     uploaded_at: datetime
+    content_hash: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -172,6 +224,22 @@ class PDFFileResponse(BaseModel):
 class PDFMoveRequest(BaseModel):
     folder_id: Optional[str]  # None이면 루트로 이동
 
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int  # 전체 파일 크기 (바이트)
+    folder_id: Optional[str] = None
+    sha256: Optional[str] = None  # 미리 알고 있으면 finalize 때 검증
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    offset: int  # 다음 청크를 보낼 위치
+    total_size: int
+    chunk_size: int  # 권장 청크 크기
+    expires_at: datetime
+
+class UploadFinalizeRequest(BaseModel):
+    sha256: str  # 클라이언트가 계산한 전체 파일 SHA-256 (필수)
+
 
 
 # ========== 인증 의존성 함수 ==========
@@ -221,124 +289,6 @@ async def get_current_user(
     return user
 
 # ========== 키워드 추출 함수 (새로 추가) ==========
-async def extract_concept_keyword(user_message: str) -> str:
-    """사용자 질문에서 핵심 개념 키워드 추출"""
-    
-    extraction_prompt = f"""다음 질문에서 핵심 키워드를 추출하세요.
-
-질문: {user_message}
-
-매우 중요한 규칙:
-1. 원본 질문에 있는 단어만 사용하세요 (새로운 단어 추가 절대 금지!)
-2. 질문 어미만 제거하세요 ("-뭐야?", "-이야?", "-인가요?", "알려줘", "설명해줘", "에 대해" 등)
-3. 핵심 개념/주제는 그대로 유지
-4. 짧은 질문은 전체가 키워드일 수 있음
-5. 긴 질문도 의문형 어미만 제거하고 내용은 유지
-6. 원본에 없는 단어를 절대 추가하지 마세요!
-
-좋은 예 (원본 단어만 사용):
-질문: "빅데이터의 개념이 뭐야?" → 빅데이터의 개념
-질문: "입출력 모듈이 메세지를 인식하는 과정" → 입출력 모듈이 메세지를 인식하는 과정
-질문: "머신러닝 알고리즘 설명해줘" → 머신러닝 알고리즘
-질문: "자료구조에 대해 알려줘" → 자료구조
-
-나쁜 예 (원본에 없는 단어 추가 - 절대 금지):
-질문: "입출력 모듈이 메세지를 인식하는 과정" → 입출력 모듈, 프로세싱, 데이터 전달 (❌ "프로세싱", "데이터 전달"은 원본에 없음)
-질문: "빅데이터의 개념이 뭐야?" → 빅데이터, 정의, 특징 (❌ "정의", "특징"은 원본에 없음)
-질문: "자료구조에 대해서 알려줘" → 자료구조에서 추출한 키워드는 자료구조입니다 (❌ 설명 포함)
-
-원본 질문의 단어만 사용해서 키워드 출력:"""
-
-    try:
-        async with httpx.AsyncClient() as client:
-            print(f"🔍 키워드 추출 중: '{user_message}'")
-            response = await client.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "llama3.1:8b",
-                    "prompt": extraction_prompt,
-                    "stream": False
-                },
-                timeout=15.0
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                keyword = result.get("response", "").strip()
-
-                # 첫 줄만 가져오기 (추가 설명 제거)
-                keyword = keyword.split('\n')[0].strip()
-
-                # "에서 추출한 키워드는", "키워드:" 등의 패턴 제거
-                import re
-                # "~에서 추출한 키워드는" 패턴 제거
-                keyword = re.sub(r'.*(에서\s*추출한\s*키워드는?|키워드는?)\s*', '', keyword)
-                # "입니다", ".", ":" 등 제거
-                keyword = re.sub(r'[.:!?]$', '', keyword)
-                keyword = keyword.replace('입니다', '').replace('습니다', '').strip()
-
-                # 따옴표 제거
-                keyword = keyword.strip('"\'')
-
-                print(f"✅ 추출된 키워드: '{keyword}'")
-                return keyword if keyword else user_message
-            else:
-                print(f"⚠️ 키워드 추출 실패 (상태: {response.status_code}), 원본 사용")
-                return user_message
-    except Exception as e:
-        print(f"⚠️ 키워드 추출 오류: {e}, 원본 사용")
-        return user_message
-
-# ========== 지식 수준 판단 함수 ==========
-async def judge_and_save_knowledge_level(room: models.ChatRoom, user_explanation: str, db: Session):
-    """사용자의 첫 번째 설명을 분석하여 지식 수준 (0-5) 판단 및 저장"""
-
-    concept = room.current_concept or "개념"
-
-    print(f"🧠 지식 수준 판단 시작: Room {room.id}, Concept: {concept}")
-
-    # 판단 프롬프트 생성
-    judgment_prompt = feynman_engine.get_knowledge_level_judgment_prompt(concept, user_explanation)
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "llama3.1:8b",
-                    "prompt": judgment_prompt,
-                    "stream": False
-                },
-                timeout=30.0
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result.get("response", "").strip()
-
-                print(f"📊 AI 판단 결과:\n{ai_response}")
-
-                # 응답에서 지식 수준 숫자 추출
-                import re
-                # "지식수준: 3" 형식에서 숫자 추출
-                match = re.search(r'지식수준\s*:\s*(\d)', ai_response)
-                if match:
-                    knowledge_level = int(match.group(1))
-                    # 0-5 범위 검증
-                    if 0 <= knowledge_level <= 5:
-                        room.knowledge_level = knowledge_level
-                        db.commit()
-                        print(f"✅ 지식 수준 저장: {knowledge_level}")
-                    else:
-                        print(f"⚠️ 범위 벗어남 ({knowledge_level}), 기본값 유지")
-                else:
-                    print(f"⚠️ 응답에서 지식 수준 숫자를 찾을 수 없음, 기본값 유지")
-            else:
-                print(f"⚠️ AI 호출 실패 (상태: {response.status_code}), 기본값 유지")
-
-    except Exception as e:
-        print(f"❌ 지식 수준 판단 오류: {e}, 기본값 유지")
-
 # ========== RAG 쿼리 생성 함수 (학습 단계별 최적화) ==========
 def get_rag_query_for_phase(phase: LearningPhase, concept: str, message: str, original_question: str = None) -> str:
     """
@@ -398,27 +348,38 @@ async def root():
 @app.get("/test-ollama")
 async def test_ollama():
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "llama3.1:8b",
-                    "prompt": "Say hello in Korean",
-                    "stream": False
-                },
-                timeout=30.0
-            )
-            
-            if response.status_code == 200:
-                return {"status": "success", "response": response.json()}
-            else:
-                return {"status": "error", "code": response.status_code}
-                
+        result = await llm_client.generate("Say hello in Korean", timeout=30.0)
+        return {"status": "success", "response": result}
+
+    except LLMError as e:
+        return {"status": "error", "code": e.status_code}
     except httpx.ConnectError:
         return {"status": "error", "message": "Cannot connect to Ollama"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/api/llm/metrics")
+async def get_llm_metrics():
+    """LLM 게이트웨이 대기열/대기 시간 + 퀴즈 생성/키워드 추출 집계"""
+    return {
+        **llm_gateway.metrics(),
+        "quiz": quiz_metrics.snapshot(),
+        "keyword": concept_keyword_extractor.metrics(),
+        "room_sessions": room_sessions.metrics(),
+        "prompts": feynman_engine.templates.metrics(),
+        "single_flight": llm_client.single_flight_metrics()
+    }
+
+@app.get("/api/llm/models")
+async def get_llm_model_metrics():
+    """모델별 워밍업/keep-alive 상태와 로딩 시간(load) vs 생성 시간(prefill/eval) 통계"""
+    return model_keeper.metrics()
+
+@app.get("/api/llm/routes")
+async def get_llm_route_metrics():
+    """작업별 모델 라우팅 설정과 경로별 성공률/지연 시간"""
+    return model_router.metrics()
+
 # ========== 인증 관련 엔드포인트 ==========
 @app.post("/api/auth/register", response_model=UserResponse)
 def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
@@ -593,7 +554,20 @@ def delete_user_account(
         deleted_quizzes = db.query(models.Quiz).filter(models.Quiz.user_id == user_id).delete(synchronize_session=False)
         print(f"  - 퀴즈 {deleted_quizzes}개 삭제 완료")
 
-        # 7. ChromaDB에서 사용자의 컬렉션 삭제
+        # 7. 진행 중인 분할 업로드 세션 삭제
+        for upload in db.query(models.UploadSession).filter(models.UploadSession.user_id == user_id).all():
+            upload_session_manager.discard(db, upload)
+
+        # 8. 사용자의 PDF 원본 참조 해제 (다른 사용자가 참조하지 않는 원본만 삭제)
+        garbage_paths = []
+        for pdf in current_user.pdf_files:
+            if pdf.content_hash:
+                garbage_paths.append(blob_store.release(db, pdf.content_hash))
+            else:
+                garbage_paths.append(pdf.file_path)
+        print(f"  - PDF {len(current_user.pdf_files)}개 참조 해제 완료")
+
+        # 9. ChromaDB에서 사용자의 컬렉션 삭제
         try:
             collection_name = f"user_{user_id}"
             rag_system.client.delete_collection(name=collection_name)
@@ -601,9 +575,10 @@ def delete_user_account(
         except Exception as e:
             print(f"  - ChromaDB 삭제 중 오류 (무시): {e}")
 
-        # 8. 사용자 계정 삭제
+        # 10. 사용자 계정 삭제
         db.delete(current_user)
         db.commit()
+        blob_store.delete_files(garbage_paths)
 
         print(f"✅ 계정 삭제 완료: {username}")
 
@@ -632,6 +607,7 @@ def delete_room(
     
     db.delete(room)
     db.commit()
+    room_sessions.invalidate(room_id)
     
     print(f"🗑️ 채팅방 삭제됨: {room_id} (User: {current_user.username})")
     
@@ -780,6 +756,15 @@ class QuizResponse(BaseModel):
 class QuizUpdate(BaseModel):
     quiz_name: str
 
+class PDFQuizGenerateRequest(BaseModel):
+    num_questions: int = 5
+    question_types: str = "mixed"
+    pages: Optional[str] = None  # "1-3,7" 형식, None이면 전체
+    concept: Optional[str] = None  # 지정 시 관련 페이지만 사용
+    sectioned: bool = False  # True면 구간별로 나눠 동시에 생성 후 병합
+    fresh: bool = False  # True면 캐시를 쓰지 않고 새로 생성 (결과는 캐시 풀에 합쳐짐)
+    shuffle: bool = False  # True면 캐시된 문제 풀에서 무작위로 뽑은 변형 반환
+
 class ProgressSubmit(BaseModel):
     results: List[Dict]  # [{"question_id": "...", "is_correct": True/False}, ...]
 
@@ -848,11 +833,13 @@ async def save_message(
 
     print(f"💾 메시지 저장됨 (단계: {message.phase}): {message.content[:50]}...")
 
-    # 첫 번째 설명 단계인 경우 지식 수준 판단
+    # 첫 번째 설명 단계인 경우 지식 수준 판단 (백그라운드, 결과는 WebSocket으로 전송)
+    judgment_pending = False
     if message.phase == "first_explanation" and message.role == "user":
-        await judge_and_save_knowledge_level(room, message.content, db)
+        knowledge_judgment_jobs.start(room.id, room.user_id, room.current_concept or "개념", message.content)
+        judgment_pending = True
 
-    return {"status": "ok", "message_id": db_message.id}
+    return {"status": "ok", "message_id": db_message.id, "knowledge_judgment_pending": judgment_pending}
 
 # ========== 새로운 파인만 학습 엔드포인트 ==========
 @app.post("/api/learning/transition", response_model=PhaseResponse)
@@ -907,7 +894,7 @@ async def get_current_phase(room_id: str, db: Session = Depends(get_db)):
 @app.post("/api/extract-keyword", response_model=KeywordExtractionResponse)
 async def extract_keyword(request: KeywordExtractionRequest):
     """텍스트에서 핵심 키워드 추출"""
-    keyword = await extract_concept_keyword(request.text)
+    keyword = await concept_keyword_extractor.extract(request.text)
     return KeywordExtractionResponse(
         original_text=request.text,
         extracted_keyword=keyword
@@ -935,8 +922,8 @@ async def initialize_learning(
     room.learning_phase = LearningPhase.KNOWLEDGE_CHECK.value
     db.commit()
 
-    # 키워드 추출은 로그 표시용으로만 사용
-    keyword = await extract_concept_keyword(request.concept)
+    # 키워드는 로그 표시용으로만 사용 → LLM을 기다리지 않고 캐시/규칙으로 얻을 수 있을 때만
+    keyword = concept_keyword_extractor.quick(request.concept) or request.concept
 
     print(f"📄 PDF 학습 초기화: Room {room_id}")
     print(f"💾 선택된 텍스트 저장: {request.concept}")
@@ -974,71 +961,240 @@ async def upload_pdf(
         if not folder:
             raise HTTPException(status_code=404, detail="Folder not found")
     
-    # 사용자별 업로드 디렉토리 생성
-    user_upload_dir = f"uploads/{current_user.id}"
-    os.makedirs(user_upload_dir, exist_ok=True)
-    
-    # 파일명 생성 (중복 방지)
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    safe_filename = f"{timestamp}_{file.filename}"
-    file_path = os.path.join(user_upload_dir, safe_filename)
-    
-    file_size = 0
-    chunk_size = 1024 * 1024  # 1MB
+    # 임시 파일로 스트리밍 저장 (저장하면서 SHA-256 계산)
+    try:
+        tmp_path, content_hash, file_size = await blob_store.spool_upload(file)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=400, detail="파일 크기는 500MB 이하여야 합니다")
     
     try:
-        # 파일 저장
-        with open(file_path, "wb") as buffer:
-            while chunk := await file.read(chunk_size):
-                file_size += len(chunk)
-                if file_size > 500 * 1024 * 1024:  # 500MB 제한
-                    os.remove(file_path)
-                    raise HTTPException(status_code=400, detail="파일 크기는 500MB 이하여야 합니다")
-                buffer.write(chunk)
-        
-        # PDF 페이지 수 확인
-        try:
-            import PyPDF2
-            with open(file_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                page_count = len(pdf_reader.pages)
-        except:
-            page_count = None
-        
-        # DB에 PDF 정보 저장
-        new_pdf = models.PDFFile(
-            user_id=current_user.id,
+        new_pdf = register_uploaded_pdf(
+            db=db,
+            user=current_user,
             folder_id=folder_id,
-            filename=safe_filename,
             original_filename=file.filename,
-            file_path=file_path,
-            file_size=file_size,
-            page_count=page_count
+            tmp_path=tmp_path,
+            content_hash=content_hash,
+            file_size=file_size
         )
-        db.add(new_pdf)
-        db.commit()
-        db.refresh(new_pdf)
-        
-        # RAG 시스템에 PDF 추가 (user_id를 collection 이름으로 사용)
-        rag_system.add_pdf_to_collection(
-        user_id=current_user.id,
-        pdf_id=new_pdf.id,
-        pdf_path=file_path,
-        filename=file.filename
-    )
         
         print(f"✅ PDF 업로드 성공: {file.filename} (User: {current_user.username}, Size: {file_size} bytes)")
         return new_pdf
             
-    except HTTPException:
-        raise
     except Exception as e:
-        # 오류 발생 시 파일 삭제
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # 오류 발생 시 임시 파일 삭제
+        db.rollback()
+        blob_store.discard_temp(tmp_path)
         print(f"❌ PDF 업로드 오류: {e}")
         raise HTTPException(status_code=500, detail=f"업로드 실패: {str(e)}")
 
+def register_uploaded_pdf(
+    db: Session,
+    user: models.User,
+    folder_id: Optional[str],
+    original_filename: str,
+    tmp_path: str,
+    content_hash: str,
+    file_size: int
+) -> models.PDFFile:
+    """임시 파일을 원본 저장소에 등록하고 PDFFile 생성 + RAG 인덱싱"""
+    # 원본 저장소 등록 (같은 내용이면 기존 파일 재사용)
+    blob = blob_store.acquire(db, tmp_path, content_hash, file_size)
+    file_path = blob.file_path
+    
+    # PDF 페이지 수 확인 (텍스트 캐시에 페이지별 텍스트 저장, RAG 인덱싱에서 재사용)
+    try:
+        page_count = len(pdf_text_cache.get_pages(file_path, content_hash))
+    except:
+        page_count = None
+    
+    # DB에 PDF 정보 저장 (표시용 파일명은 업로드 시각 기준)
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    new_pdf = models.PDFFile(
+        user_id=user.id,
+        folder_id=folder_id,
+        filename=f"{timestamp}_{original_filename}",
+        original_filename=original_filename,
+        file_path=file_path,
+        file_size=file_size,
+        page_count=page_count,
+        content_hash=content_hash
+    )
+    db.add(new_pdf)
+    db.commit()
+    db.refresh(new_pdf)
+    
+    # RAG 시스템에 PDF 추가 (user_id를 collection 이름으로 사용)
+    rag_system.add_pdf_to_collection(
+        user_id=user.id,
+        pdf_id=new_pdf.id,
+        pdf_path=file_path,
+        filename=original_filename,
+        content_hash=content_hash
+    )
+
+    # (선택) 남는 LLM 용량으로 퀴즈 문제 풀 미리 생성
+    quiz_pool_pregenerator.schedule(content_hash, file_path)
+    return new_pdf
+
+# ========== 이어받기 가능한 분할 업로드 API ==========
+def get_upload_session(db: Session, upload_id: str, user: models.User) -> models.UploadSession:
+    """본인의 업로드 세션 조회 (만료된 세션은 정리 후 404)"""
+    upload = db.query(models.UploadSession).filter(
+        models.UploadSession.id == upload_id,
+        models.UploadSession.user_id == user.id
+    ).first()
+
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    if upload.expires_at < datetime.utcnow():
+        upload_session_manager.discard(db, upload)
+        db.commit()
+        raise HTTPException(status_code=404, detail="Upload session expired")
+
+    return upload
+
+def upload_session_response(upload: models.UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        upload_id=upload.id,
+        offset=upload.received_size,
+        total_size=upload.total_size,
+        chunk_size=CHUNK_SIZE * 4,
+        expires_at=upload.expires_at
+    )
+
+@app.post("/api/pdf/uploads", response_model=UploadSessionResponse)
+async def create_upload_session(
+    request: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """분할 업로드 세션 생성"""
+    if not request.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="PDF 파일만 업로드 가능합니다")
+
+    if request.folder_id:
+        folder = db.query(models.Folder).filter(
+            models.Folder.id == request.folder_id,
+            models.Folder.user_id == current_user.id
+        ).first()
+        if not folder:
+            raise HTTPException(status_code=404, detail="Folder not found")
+
+    # 방치된 세션 정리
+    upload_session_manager.cleanup_expired(db)
+
+    try:
+        upload = upload_session_manager.create(
+            db=db,
+            user_id=current_user.id,
+            original_filename=request.filename,
+            total_size=request.total_size,
+            folder_id=request.folder_id,
+            expected_sha256=request.sha256
+        )
+    except UploadIntegrityError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    db.refresh(upload)
+
+    print(f"📤 분할 업로드 시작: {request.filename} ({request.total_size} bytes, User: {current_user.username})")
+    return upload_session_response(upload)
+
+@app.get("/api/pdf/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session_status(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """업로드 진행 위치 조회 (연결이 끊긴 뒤 이어받을 offset 확인용)"""
+    upload = get_upload_session(db, upload_id, current_user)
+    return upload_session_response(upload)
+
+@app.patch("/api/pdf/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """청크 전송 (요청 본문 = 원시 바이트, Upload-Offset 헤더 = 시작 위치)"""
+    upload = get_upload_session(db, upload_id, current_user)
+
+    try:
+        await upload_session_manager.append_chunk(db, upload, upload_offset, request.stream())
+    except UploadOffsetMismatchError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload-Offset이 일치하지 않습니다 (현재 offset: {e.expected_offset})",
+            headers={"Upload-Offset": str(e.expected_offset)}
+        )
+    except UploadBusyError:
+        raise HTTPException(status_code=409, detail="이 업로드 세션에 이미 청크를 전송 중입니다")
+    except UploadIntegrityError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return upload_session_response(upload)
+
+@app.post("/api/pdf/uploads/{upload_id}/finalize", response_model=PDFFileResponse)
+async def finalize_upload(
+    upload_id: str,
+    request: UploadFinalizeRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """업로드 완료: 크기/체크섬/PDF 형식 검증 후 저장소 등록 및 RAG 인덱싱"""
+    upload = get_upload_session(db, upload_id, current_user)
+    if upload_session_manager.is_busy(upload):
+        raise HTTPException(status_code=409, detail="이 업로드 세션에 아직 청크를 전송 중입니다")
+
+    try:
+        content_hash = await asyncio.to_thread(upload_session_manager.verify, upload, request.sha256)
+    except UploadIncompleteError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(upload.received_size)})
+    except UploadIntegrityError as e:
+        # 손상된 업로드는 이어받을 수 없으므로 폐기
+        upload_session_manager.discard(db, upload)
+        db.commit()
+        raise HTTPException(status_code=422, detail=str(e))
+
+    original_filename = upload.original_filename
+    try:
+        # 임시 파일은 원본 저장소로 넘어가므로 세션 행만 삭제
+        db.delete(upload)
+        new_pdf = register_uploaded_pdf(
+            db=db,
+            user=current_user,
+            folder_id=upload.folder_id,
+            original_filename=original_filename,
+            tmp_path=upload.temp_path,
+            content_hash=content_hash,
+            file_size=upload.total_size
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 분할 업로드 완료 처리 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"업로드 실패: {str(e)}")
+
+    print(f"✅ 분할 업로드 완료: {original_filename} (User: {current_user.username}, Size: {new_pdf.file_size} bytes)")
+    return new_pdf
+
+@app.delete("/api/pdf/uploads/{upload_id}")
+async def cancel_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """업로드 취소 (임시 파일 삭제)"""
+    upload = get_upload_session(db, upload_id, current_user)
+    if upload_session_manager.is_busy(upload):
+        raise HTTPException(status_code=409, detail="이 업로드 세션에 아직 청크를 전송 중입니다")
+    upload_session_manager.discard(db, upload)
+    db.commit()
+    return {"status": "ok", "message": "Upload cancelled"}
+
 @app.get("/api/pdf/list", response_model=List[PDFFileResponse])
 async def list_pdfs(
     folder_id: Optional[str] = None,
@@ -1116,13 +1272,15 @@ async def delete_pdf(
     # RAG 시스템에서 삭제
     rag_system.delete_pdf_from_collection(current_user.id, pdf_id)
 
-    # 실제 파일 삭제
-    if os.path.exists(pdf.file_path):
-        os.remove(pdf.file_path)
-
-    # DB에서 삭제
+    # DB에서 삭제 + 원본 참조 해제 (마지막 참조일 때만 파일 삭제)
     db.delete(pdf)
+    garbage_paths = []
+    if pdf.content_hash:
+        garbage_paths.append(blob_store.release(db, pdf.content_hash))
+    else:
+        garbage_paths.append(pdf.file_path)  # 원본 저장소 도입 전 업로드
     db.commit()
+    blob_store.delete_files(garbage_paths)
 
     print(f"✅ PDF 삭제: {pdf.original_filename} (연결된 채팅방: {linked_room_count}개)")
     return {
@@ -1131,6 +1289,128 @@ async def delete_pdf(
         "linked_rooms_count": linked_room_count
     }
 
+# ========== PDF 다운로드 API ==========
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"  # 내용 해시 기반이라 변하지 않음
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 헤더가 ETag와 일치하는지 확인"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+@app.get("/api/pdf/{pdf_id}/download")
+def download_pdf(
+    pdf_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """PDF 원본 다운로드 (인증 필요, 내용 해시 ETag, Range 요청 지원)
+
+    - 같은 내용이면 ETag가 같으므로 재열람은 If-None-Match → 304
+    - Range/If-Range는 FileResponse가 처리하여 첫 페이지를 먼저 렌더링할 수 있음
+    - 서버가 http.response.pathsend를 지원하면 FileResponse가 파일 전송을 서버에 위임
+    """
+    pdf = db.query(models.PDFFile).filter(
+        models.PDFFile.id == pdf_id,
+        models.PDFFile.user_id == current_user.id
+    ).first()
+
+    if not pdf:
+        raise HTTPException(status_code=404, detail="PDF not found")
+
+    if not os.path.exists(pdf.file_path):
+        raise HTTPException(status_code=404, detail="PDF file missing")
+
+    content_hash = pdf.content_hash or file_sha256(pdf.file_path)
+    etag = f'"{content_hash}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        pdf.file_path,
+        media_type="application/pdf",
+        filename=pdf.original_filename,
+        content_disposition_type="inline",
+        headers=headers
+    )
+
+# ========== PDF 페이지 미리보기 API ==========
+@app.get("/api/pdf/{pdf_id}/pages/{page}/text")
+def get_pdf_page_text(
+    pdf_id: str,
+    page: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """PDF 한 페이지의 텍스트 (텍스트 캐시 사용)"""
+    pdf = db.query(models.PDFFile).filter(
+        models.PDFFile.id == pdf_id,
+        models.PDFFile.user_id == current_user.id
+    ).first()
+
+    if not pdf:
+        raise HTTPException(status_code=404, detail="PDF not found")
+
+    content_hash = pdf.content_hash or file_sha256(pdf.file_path)
+    # 추출 엔진이나 캐시 형식이 바뀌면 같은 페이지라도 텍스트가 달라지므로 ETag에 포함
+    etag = f'"{content_hash}-p{page}-text-{pdf_text_cache.engine.name}-v{CACHE_FORMAT_VERSION}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    pages = pdf_text_cache.get_pages(pdf.file_path, content_hash)
+    if page < 1 or page > len(pages):
+        raise HTTPException(status_code=404, detail="Page not found")
+
+    return JSONResponse(
+        content={
+            "pdf_id": pdf_id,
+            "page": page,
+            "page_count": len(pages),
+            "text": pages[page - 1]
+        },
+        headers=headers
+    )
+
+@app.get("/api/pdf/{pdf_id}/pages/{page}/thumbnail")
+def get_pdf_page_thumbnail(
+    pdf_id: str,
+    page: int,
+    request: Request,
+    width: int = 320,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """PDF 한 페이지의 저해상도 JPEG 썸네일 (디스크 렌더 캐시 사용)"""
+    pdf = db.query(models.PDFFile).filter(
+        models.PDFFile.id == pdf_id,
+        models.PDFFile.user_id == current_user.id
+    ).first()
+
+    if not pdf:
+        raise HTTPException(status_code=404, detail="PDF not found")
+
+    width = snap_width(width)
+    content_hash = pdf.content_hash or file_sha256(pdf.file_path)
+    etag = f'"{content_hash}-p{page}-w{width}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        thumbnail_path, _ = page_render_cache.get_thumbnail(pdf.file_path, content_hash, page, width)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Page not found")
+    except RenderUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    return FileResponse(thumbnail_path, media_type="image/jpeg", headers=headers)
+
 @app.put("/api/pdf/{pdf_id}/move")
 async def move_pdf(
     pdf_id: str,
@@ -1276,6 +1556,50 @@ async def link_pdf_to_room(
 
 
 # ========== 수정된 WebSocket (파인만 통합) ==========
+async def send_knowledge_check_intro(websocket: WebSocket, db: Session, room: models.ChatRoom, concept_keyword: str):
+    """KNOWLEDGE_CHECK 진입 안내 메시지 저장 + 전송"""
+    simple_response = f"'{concept_keyword}'에 대해 학습하시는군요! 이 개념에 대해 얼마나 알고 계신가요?"
+
+    ai_msg = models.Message(
+        room_id=room.id,
+        role="assistant",
+        content=simple_response,
+        phase=LearningPhase.KNOWLEDGE_CHECK.value if hasattr(models.Message, 'phase') else None
+    )
+    db.add(ai_msg)
+    room.updated_at = datetime.utcnow()
+    db.commit()
+
+    await websocket.send_json({
+        "type": "stream",
+        "content": simple_response,
+        "phase": LearningPhase.KNOWLEDGE_CHECK.value
+    })
+
+    await websocket.send_json({
+        "type": "complete",
+        "phase": LearningPhase.KNOWLEDGE_CHECK.value
+    })
+
+    print("✅ KNOWLEDGE_CHECK 단계로 전환 완료")
+
+async def backfill_concept_keyword(websocket: WebSocket, db: Session, room: models.ChatRoom, user_message: str):
+    """단계 전환 알림 뒤 LLM으로 키워드를 추출해 채팅방에 반영하고 안내 메시지 전송"""
+    concept_keyword = await concept_keyword_extractor.extract(user_message, room.user_id)
+
+    # 그 사이 다른 질문으로 바뀌지 않았을 때만 반영
+    if room.original_question == user_message:
+        room.current_concept = concept_keyword
+        db.commit()
+        print(f"💾 키워드 보충 저장: '{concept_keyword}'")
+
+    await websocket.send_json({
+        "type": "concept_keyword",
+        "keyword": concept_keyword,
+        "phase": LearningPhase.KNOWLEDGE_CHECK.value
+    })
+    await send_knowledge_check_intro(websocket, db, room, concept_keyword)
+
 @app.websocket("/ws/chat/{room_id}")
 async def websocket_endpoint_with_feynman(
     websocket: WebSocket, 
@@ -1285,6 +1609,7 @@ async def websocket_endpoint_with_feynman(
     print(f"✅ WebSocket 연결됨 (Room: {room_id})")
 
     db = SessionLocal()
+    keyword_task: Optional[asyncio.Task] = None
     
     try:
         room = db.query(models.ChatRoom).filter(models.ChatRoom.id == room_id).first()
@@ -1292,12 +1617,20 @@ async def websocket_endpoint_with_feynman(
             await websocket.send_json({"error": "Room not found"})
             await websocket.close()
             return
+
+        # 지식 수준 판단 등 백그라운드 작업 결과를 이 연결로 받기 위해 등록
+        room_connections.register(room_id, websocket)
         
         while True:
             data = await websocket.receive_text()
             print(f"📥 받은 메시지 (Room {room_id}): {data}")
             
             message_data = json.loads(data)
+
+            # 키워드 보충이 아직 진행 중이면 끝난 뒤 처리 (current_concept 확정)
+            if keyword_task is not None:
+                await keyword_task
+                keyword_task = None
             
             # 메시지 타입 확인
             msg_type = message_data.get("type", "message")
@@ -1310,6 +1643,7 @@ async def websocket_endpoint_with_feynman(
                 
                 room.learning_phase = next_phase.value
                 db.commit()
+                room_sessions.invalidate(room_id)
                 
                 await websocket.send_json({
                     "type": "phase_changed",
@@ -1379,53 +1713,34 @@ async def websocket_endpoint_with_feynman(
             print(f"💾 사용자 메시지 저장됨 (단계: {current_phase.value})")
             
             if current_phase == LearningPhase.HOME:
-                # 키워드 추출
-                concept_keyword = await extract_concept_keyword(user_message)
+                # 키워드: 캐시/규칙으로 바로 얻을 수 있으면 사용, 아니면 원본 질문으로 먼저 전환하고 나중에 채움
+                concept_keyword = concept_keyword_extractor.quick(user_message)
 
                 # 채팅 경로: 키워드 + 원본 질문 모두 저장
-                room.current_concept = concept_keyword
+                room.current_concept = concept_keyword or user_message
                 room.original_question = user_message  # 원본 질문 보존 (맥락 보존)
                 room.learning_phase = LearningPhase.KNOWLEDGE_CHECK.value
                 db.commit()
 
                 print(f"💬 채팅 메시지: '{user_message}'")
-                print(f"💾 추출된 키워드 저장: '{concept_keyword}'")
+                print(f"💾 추출된 키워드 저장: '{room.current_concept}'")
                 print(f"📝 원본 질문 저장: '{user_message}'")
                 print(f"🔄 단계 전환: HOME → KNOWLEDGE_CHECK")
-    
-            # AI 응답 없이 바로 단계 전환 알림
+
+                # AI 응답 없이 바로 단계 전환 알림
                 await websocket.send_json({
                     "type": "phase_changed",
                     "phase": LearningPhase.KNOWLEDGE_CHECK.value,
                     "instruction": flow_manager.get_phase_instruction(LearningPhase.KNOWLEDGE_CHECK),
                     "title": flow_manager.get_phase_title(LearningPhase.KNOWLEDGE_CHECK)
                 })
-    
-                # 단순 안내 메시지만 전송
-                simple_response = f"'{concept_keyword}'에 대해 학습하시는군요! 이 개념에 대해 얼마나 알고 계신가요?"
-    
-                ai_msg = models.Message(
-                    room_id=room_id,
-                    role="assistant",
-                    content=simple_response,
-                    phase=LearningPhase.KNOWLEDGE_CHECK.value if hasattr(models.Message, 'phase') else None
-                )
-                db.add(ai_msg)
-                room.updated_at = datetime.utcnow()
-                db.commit()
-    
-                await websocket.send_json({
-                    "type": "stream",
-                    "content": simple_response,
-                    "phase": LearningPhase.KNOWLEDGE_CHECK.value
-                })
-    
-                await websocket.send_json({
-                    "type": "complete",
-                    "phase": LearningPhase.KNOWLEDGE_CHECK.value
-                })
-    
-                print("✅ KNOWLEDGE_CHECK 단계로 전환 완료")
+
+                if concept_keyword is None:
+                    keyword_task = asyncio.create_task(
+                        backfill_concept_keyword(websocket, db, room, user_message)
+                    )
+                else:
+                    await send_knowledge_check_intro(websocket, db, room, concept_keyword)
                 continue  # Ollama 호출 없이 다음 메시지 대기
 
 
@@ -1435,6 +1750,10 @@ async def websocket_endpoint_with_feynman(
                 analysis = evaluator.analyze_explanation(user_message)
                 print(f"📊 설명 분석 완료")
             
+            # AI 설명은 지식 수준에 맞춰야 하므로 판단이 아직 진행 중이면 이때만 기다림
+            if current_phase == LearningPhase.AI_EXPLANATION and await knowledge_judgment_jobs.wait(room_id):
+                db.refresh(room)
+
             # 컨텍스트 준비
             context = {
                 "concept": room.current_concept if hasattr(room, 'current_concept') else None,
@@ -1450,15 +1769,12 @@ async def websocket_endpoint_with_feynman(
             # Ollama API 호출
             ai_response = ""
             try:
-                async with httpx.AsyncClient() as client:
-                    print("🤖 Ollama 요청 중 (파인만 모드)...")
-
-                    # Ollama에 시스템 프롬프트 포함
-                    if pdf_has_content:
-                        # PDF에 관련 내용이 있는 경우: PDF 기반으로만 답변하도록 강제
-                        full_prompt = f"""{system_prompt}
+                print("🤖 Ollama 요청 중 (파인만 모드)...")
 
-{rag_context}
+                # 이번 턴에 추가되는 부분 (RAG 자료 + 사용자 메시지)
+                if pdf_has_content:
+                    # PDF에 관련 내용이 있는 경우: PDF 기반으로만 답변하도록 강제
+                    turn_prompt = f"""{rag_context}
 
 **🔴 중요 지시사항 (반드시 준수):**
 1. 위에 제공된 PDF 자료의 내용만을 기반으로 답변하세요
@@ -1470,64 +1786,67 @@ async def websocket_endpoint_with_feynman(
 사용자: {user_message}
 
 AI:"""
-                    elif room.pdf_id:
-                        # PDF는 등록되어 있지만 관련 내용을 찾지 못한 경우
-                        full_prompt = f"""{system_prompt}
-
-**알림:** 등록된 PDF 자료에서 '{user_message}'와 관련된 내용을 찾을 수 없습니다.
+                elif room.pdf_id:
+                    # PDF는 등록되어 있지만 관련 내용을 찾지 못한 경우
+                    turn_prompt = f"""**알림:** 등록된 PDF 자료에서 '{user_message}'와 관련된 내용을 찾을 수 없습니다.
 일반적인 지식을 바탕으로 답변하겠습니다.
 
 사용자: {user_message}
 
 AI:"""
-                    else:
-                        # PDF가 등록되지 않은 경우: 일반 지식으로 답변
-                        full_prompt = f"{system_prompt}\n\n사용자: {user_message}\n\nAI:"
-
-                    print(f"📝 프롬프트 길이: {len(full_prompt)} 문자")
-                    print(f"📝 PDF 컨텍스트 사용: {pdf_has_content}")
-                    print(f"📝 프롬프트 미리보기:\n{full_prompt[:500]}...")
-                    
-                    async with client.stream(
-                        "POST",
-                        "http://localhost:11434/api/generate",
-                        json={
-                            "model": "llama3.1:8b",
-                            "prompt": full_prompt,
-                            "stream": True
-                        },
-                        timeout=httpx.Timeout(60.0, connect=10.0)
-                    ) as response:
-                        
-                        print(f"📡 Ollama 응답 상태: {response.status_code}")
-                        
-                        if response.status_code != 200:
+                else:
+                    # PDF가 등록되지 않은 경우: 일반 지식으로 답변
+                    turn_prompt = f"사용자: {user_message}\n\nAI:"
+
+                # 같은 조건으로 이어지는 턴이면 이전 context(시스템 프롬프트 + 이전 대화)를 재사용하고
+                # 이번 턴 부분만 전송 → Ollama가 접두부를 다시 prefill하지 않음
+                signature = session_signature(current_phase.value, room.pdf_id, room.current_concept, system_prompt)
+                session_context = room_sessions.get(room_id, signature)
+                if session_context:
+                    full_prompt = turn_prompt
+                    print(f"♻️ 이전 context 재사용 ({len(session_context)} 토큰)")
+                else:
+                    full_prompt = f"{system_prompt}\n\n{turn_prompt}"
+
+                print(f"📝 프롬프트 길이: {len(full_prompt)} 문자")
+                print(f"📝 PDF 컨텍스트 사용: {pdf_has_content}")
+                print(f"📝 프롬프트 미리보기:\n{full_prompt[:500]}...")
+                
+                started = time.monotonic()
+                try:
+                    context_payload = {"context": session_context} if session_context else {}
+                    async for chunk_data in llm_client.stream_generate(
+                        full_prompt,
+                        timeout=60.0,
+                        priority=Priority.INTERACTIVE,
+                        user_id=room.user_id,
+                        **model_router.params("chat"),
+                        **context_payload
+                    ):
+                        if chunk_data.get("done"):
+                            room_sessions.update(room_id, signature, chunk_data.get("context"))
+                        if "response" in chunk_data:
+                            chunk = chunk_data["response"]
+                            ai_response += chunk
+
                             await websocket.send_json({
-                                "type": "error",
-                                "content": f"Ollama error: {response.status_code}"
+                                "type": "stream",
+                                "content": chunk,
+                                "phase": current_phase.value
                             })
-                            continue
-                        
-                        async for line in response.aiter_lines():
-                            if line.strip():
-                                try:
-                                    chunk_data = json.loads(line)
-                                    
-                                    if "response" in chunk_data:
-                                        chunk = chunk_data["response"]
-                                        ai_response += chunk
-                                        
-                                        await websocket.send_json({
-                                            "type": "stream",
-                                            "content": chunk,
-                                            "phase": current_phase.value
-                                        })
-                                    
-                                    if chunk_data.get("done", False):
-                                        break
-                                        
-                                except json.JSONDecodeError:
-                                    continue
+                except LLMError as e:
+                    model_router.record("chat", started, ok=False)
+                    room_sessions.invalidate(room_id)
+                    print(f"📡 Ollama 응답 상태: {e.status_code}")
+                    await websocket.send_json({
+                        "type": "error",
+                        "content": f"Ollama error: {e.status_code}"
+                    })
+                    continue
+                except httpx.TimeoutException:
+                    model_router.record("chat", started, ok=False)
+                    raise
+                model_router.record("chat", started, ok=bool(ai_response.strip()))
                 
                 # AI 응답 저장
                 ai_msg = models.Message(
@@ -1580,6 +1899,9 @@ AI:"""
     except Exception as e:
         print(f"❌ WebSocket 오류: {e}")
     finally:
+        if keyword_task is not None and not keyword_task.done():
+            keyword_task.cancel()
+        room_connections.unregister(room_id, websocket)
         db.close()
 
 # ========== Planner API - Goals ==========
@@ -2002,56 +2324,326 @@ async def update_quiz(
     print(f"✏️ 퀴즈 수정됨: {old_name} -> {quiz.quiz_name}")
     return quiz
 
+def store_quiz_result(db: Session, cache_key: Dict, questions: List[Dict]) -> None:
+    """생성한 퀴즈를 캐시에 저장 (실패해도 생성 결과는 그대로 반환할 수 있도록 기록만 함)"""
+    try:
+        quiz_result_cache.store(db, cache_key, questions)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ 퀴즈 캐시 저장 실패: {cache_key['content_hash'][:12]} {e}")
+
 @app.post("/api/quizzes/generate-from-pdf")
 async def generate_quiz_from_pdf(
+    http_request: Request,
     file: UploadFile = File(...),
     num_questions: int = Form(5),
     question_types: str = Form("mixed"),
+    db: Session = Depends(get_db),
     current_user: Optional[models.User] = Depends(get_current_user)
 ):
-    """PDF에서 AI 퀴즈 생성 (저장하지 않고 반환만)"""
+    """PDF에서 AI 퀴즈 생성 (저장하지 않고 반환만, 같은 내용의 PDF는 캐시된 결과 사용)"""
     try:
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="PDF 파일만 업로드 가능합니다")
 
-        # PDF 읽기
-        contents = await file.read()
-        pdf_file = BytesIO(contents)
-        pdf_file.name = file.filename
+        # PDF를 임시 파일로 스트리밍 저장 (요청당 메모리 사용량을 PDF 크기와 무관하게 유지)
+        try:
+            tmp_path, content_hash, _ = await blob_store.spool_upload(file)
+        except UploadTooLargeError:
+            raise HTTPException(status_code=400, detail="파일 크기는 500MB 이하여야 합니다")
 
-        # 텍스트 추출
-        text = extract_text_from_pdf(pdf_file)
+        # 페이지별 텍스트 추출 (같은 PDF면 캐시 사용) 후 생성 시작 전에 임시 파일과 업로드 버퍼 해제
+        try:
+            pages = pdf_text_cache.get_pages(tmp_path, content_hash)
+        except Exception as e:
+            print(f"❌ PDF 텍스트 추출 오류: {e}")
+            pages = []
+        finally:
+            blob_store.discard_temp(tmp_path)
+            await file.close()
+
+        # 문서 전체에서 고르게 뽑은 대표 텍스트 (토큰 예산 내)
+        text = select_representative_text(list(enumerate(pages, 1)), max_tokens=QUIZ_SOURCE_MAX_TOKENS)
         if not text:
             raise HTTPException(status_code=400, detail="PDF에서 텍스트를 추출할 수 없습니다")
 
-        # 텍스트 길이 제한 (5000 토큰 = 20000자)
-        text = truncate_text(text, max_tokens=5000)
+        # 같은 내용의 PDF로 만든 결과(또는 사전 생성 풀)가 있으면 바로 반환
+        # 임시 파일은 이미 지웠으므로 풀 보충은 예약하지 않음
+        request = PDFQuizGenerateRequest(num_questions=num_questions, question_types=question_types)
+        page_numbers = list(range(1, len(pages) + 1))
+        cache_key, questions = lookup_cached_quiz(db, content_hash, len(pages), page_numbers, request)
+        if questions:
+            return {
+                "success": True,
+                "filename": file.filename,
+                "questions": questions,
+                "cached": True,
+                "message": f"{len(questions)}개의 문제가 생성되었습니다"
+            }
 
         # AI 퀴즈 생성
-        questions = generate_quiz_from_text(
+        questions = await generate_quiz_from_text(
             text=text,
             num_questions=num_questions,
-            question_types=question_types
+            question_types=question_types,
+            user_id=current_user.id if current_user else None,
+            is_disconnected=http_request.is_disconnected
         )
 
         if not questions:
             raise HTTPException(status_code=500, detail="AI 퀴즈 생성에 실패했습니다")
 
         print(f"🤖 AI 퀴즈 생성 완료: {file.filename} → {len(questions)}문제")
+        if cache_key and len(questions) >= num_questions:
+            store_quiz_result(db, cache_key, questions)
+
         return {
             "success": True,
             "filename": file.filename,
             "questions": questions,
+            "cached": False,
             "message": f"{len(questions)}개의 문제가 생성되었습니다"
         }
 
     except HTTPException:
         raise
+    except QuizGenerationCancelled:
+        # 클라이언트가 이미 떠났으므로 응답은 전달되지 않음 (nginx 관례의 499)
+        return Response(status_code=499)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"퀴즈 생성 중 오류 발생: {str(e)}")
 
+def prepare_pdf_quiz_source(
+    pdf_id: str,
+    request: PDFQuizGenerateRequest,
+    db: Session,
+    current_user: models.User
+) -> Tuple[models.PDFFile, List[int], str]:
+    """업로드된 PDF에서 퀴즈 원문 선택 (페이지 범위, 개념 필터, 토큰 예산)
+
+    Returns:
+        (PDF, 사용한 페이지 번호, 대표 텍스트)
+    """
+    pdf = db.query(models.PDFFile).filter(
+        models.PDFFile.id == pdf_id,
+        models.PDFFile.user_id == current_user.id
+    ).first()
+
+    if not pdf:
+        raise HTTPException(status_code=404, detail="PDF not found")
+
+    # 페이지별 텍스트 (업로드 때 저장된 텍스트 캐시)
+    pages = pdf_text_cache.get_pages(pdf.file_path, pdf.content_hash)
+
+    try:
+        page_numbers = parse_page_ranges(request.pages, len(pages))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 개념 필터: RAG 검색으로 관련 페이지만 선택 (관련도 순서 유지)
+    ranked_pages = None
+    if request.concept:
+        contexts = rag_system.search_by_pdf(
+            user_id=current_user.id,
+            pdf_id=pdf_id,
+            query=request.concept,
+            n_results=10
+        )
+        ranked_pages = [ctx['page'] for ctx in contexts if isinstance(ctx['page'], int)]
+        page_numbers = [page for page in page_numbers if page in ranked_pages]
+        if not page_numbers:
+            raise HTTPException(status_code=404, detail=f"'{request.concept}' 관련 내용을 PDF에서 찾을 수 없습니다")
+
+    # 토큰 예산 내 대표 텍스트 (개념이 있으면 관련도 순으로 채움)
+    text = select_representative_text(
+        [(page, pages[page - 1]) for page in page_numbers],
+        max_tokens=QUIZ_SOURCE_MAX_TOKENS,
+        ranked_pages=ranked_pages
+    )
+    if not text:
+        raise HTTPException(status_code=400, detail="선택한 페이지에서 텍스트를 찾을 수 없습니다")
+
+    return pdf, page_numbers, text
+
+def lookup_cached_quiz(
+    db: Session,
+    content_hash: Optional[str],
+    page_count: Optional[int],
+    page_numbers: List[int],
+    request: PDFQuizGenerateRequest,
+    pdf_path: Optional[str] = None
+) -> Tuple[Optional[Dict], Optional[List[Dict]]]:
+    """퀴즈 결과 캐시 → 사전 생성 풀 순서로 조회
+
+    Args:
+        pdf_path: 풀 보충에 쓸 저장된 PDF 경로 (없으면 보충 예약 안 함)
+
+    Returns:
+        (생성 결과를 저장할 캐시 키, 캐시/풀에서 찾은 문제 또는 None)
+    """
+    if not content_hash:
+        return None, None
+
+    cache_key = quiz_result_cache.make_key(
+        content_hash, page_numbers, request.num_questions, request.question_types, request.concept
+    )
+    if request.fresh:
+        return cache_key, None
+
+    questions = quiz_result_cache.get(db, cache_key, request.num_questions, shuffle=request.shuffle)
+    if questions:
+        return cache_key, questions
+
+    # 사전 생성 풀은 문서 전체 + 개념 필터 없는 요청에만 사용
+    if request.concept or not page_count or len(page_numbers) != page_count:
+        return cache_key, None
+
+    taken = quiz_result_cache.take_from_pool(
+        db,
+        quiz_result_cache.pool_key(content_hash, page_count),
+        request.num_questions,
+        request.question_types,
+        shuffle=request.shuffle
+    )
+    if pdf_path and (taken is None or taken[1] < QUIZ_POOL_LOW_WATER):
+        # 풀이 비었거나 줄어들면 백그라운드로 보충
+        quiz_pool_pregenerator.schedule(content_hash, pdf_path)
+    return cache_key, taken[0] if taken else None
+
+@app.post("/api/quizzes/generate-from-pdf/{pdf_id}")
+async def generate_quiz_from_uploaded_pdf(
+    pdf_id: str,
+    request: PDFQuizGenerateRequest,
+    http_request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """이미 업로드된 PDF에서 AI 퀴즈 생성 (재업로드/재파싱 없이 캐시된 텍스트 사용)"""
+    try:
+        pdf, page_numbers, text = prepare_pdf_quiz_source(pdf_id, request, db, current_user)
+
+        # 같은 내용/조건으로 생성한 결과나 사전 생성된 문제가 있으면 바로 반환
+        cache_key, questions = lookup_cached_quiz(
+            db, pdf.content_hash, pdf.page_count, page_numbers, request, pdf_path=pdf.file_path
+        )
+        if questions:
+            return {
+                "success": True,
+                "filename": pdf.original_filename,
+                "pdf_id": pdf_id,
+                "pages": page_numbers,
+                "questions": questions,
+                "cached": True,
+                "message": f"{len(questions)}개의 문제가 생성되었습니다"
+            }
+
+        # AI 퀴즈 생성 (구간별 병렬 생성 선택 가능)
+        generate = generate_quiz_sectioned if request.sectioned else generate_quiz_from_text
+        questions = await generate(
+            text=text,
+            num_questions=request.num_questions,
+            question_types=request.question_types,
+            user_id=current_user.id,
+            is_disconnected=http_request.is_disconnected
+        )
+
+        if not questions:
+            raise HTTPException(status_code=500, detail="AI 퀴즈 생성에 실패했습니다")
+
+        print(f"🤖 AI 퀴즈 생성 완료: {pdf.original_filename} (페이지 {len(page_numbers)}개) → {len(questions)}문제")
+        if cache_key and len(questions) >= request.num_questions:
+            store_quiz_result(db, cache_key, questions)
+
+        return {
+            "success": True,
+            "filename": pdf.original_filename,
+            "pdf_id": pdf_id,
+            "pages": page_numbers,
+            "questions": questions,
+            "cached": False,
+            "message": f"{len(questions)}개의 문제가 생성되었습니다"
+        }
+
+    except HTTPException:
+        raise
+    except QuizGenerationCancelled:
+        # 클라이언트가 이미 떠났으므로 응답은 전달되지 않음 (nginx 관례의 499)
+        return Response(status_code=499)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"퀴즈 생성 중 오류 발생: {str(e)}")
+
+def sse_event(event: str, data: Dict) -> str:
+    """Server-Sent Events 메시지 한 개"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/quizzes/generate-from-pdf/{pdf_id}/stream")
+async def stream_quiz_from_uploaded_pdf(
+    pdf_id: str,
+    request: PDFQuizGenerateRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """업로드된 PDF에서 AI 퀴즈를 생성하며 문제가 완성될 때마다 SSE로 전송
+
+    이벤트: question({index, question}) → done({count, pages}) / error({message})
+    클라이언트가 연결을 끊으면 스트림이 취소되고 Ollama 생성도 중단된다.
+    """
+    pdf, page_numbers, text = prepare_pdf_quiz_source(pdf_id, request, db, current_user)
+    user_id = current_user.id
+
+    cache_key, cached_questions = lookup_cached_quiz(
+        db, pdf.content_hash, pdf.page_count, page_numbers, request, pdf_path=pdf.file_path
+    )
+
+    async def event_stream():
+        if cached_questions:
+            for index, question in enumerate(cached_questions, 1):
+                yield sse_event("question", {"index": index, "question": question})
+            yield sse_event("done", {"count": len(cached_questions), "pages": page_numbers, "cached": True})
+            return
+
+        count = 0
+        generated = []
+        try:
+            async for question in stream_quiz_questions(
+                text=text,
+                num_questions=request.num_questions,
+                question_types=request.question_types,
+                user_id=user_id
+            ):
+                count += 1
+                generated.append(question)
+                yield sse_event("question", {"index": count, "question": question})
+
+            if count == 0:
+                yield sse_event("error", {"message": "AI 퀴즈 생성에 실패했습니다"})
+                return
+
+            print(f"🌊 AI 퀴즈 스트리밍 완료: {pdf.original_filename} → {count}문제")
+            if cache_key and count >= request.num_questions:
+                # 요청 스코프 DB 세션은 스트리밍 전에 닫히므로 별도 세션 사용
+                cache_db = SessionLocal()
+                try:
+                    store_quiz_result(cache_db, cache_key, generated)
+                finally:
+                    cache_db.close()
+            yield sse_event("done", {"count": count, "pages": page_numbers, "cached": False})
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield sse_event("error", {"message": f"퀴즈 생성 중 오류 발생: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ========== Progress (Spaced Repetition) API ==========
 
 @app.post("/api/progress")
@@ -0,0 +1,163 @@
+# backend/upload_sessions.py
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional, Set
+from sqlalchemy.orm import Session
+import models
+from blob_store import blob_store, MAX_UPLOAD_SIZE, CHUNK_SIZE
+
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadOffsetMismatchError(Exception):
+    """클라이언트가 보낸 offset이 서버에 기록된 위치와 다름"""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f"offset mismatch (expected {expected_offset})")
+        self.expected_offset = expected_offset
+
+
+class UploadIncompleteError(Exception):
+    """아직 모든 바이트를 받지 못한 세션을 완료하려 함"""
+
+
+class UploadIntegrityError(Exception):
+    """업로드 검증 실패 (크기, 체크섬, PDF 형식)"""
+
+
+class UploadBusyError(Exception):
+    """같은 세션에 이미 청크를 쓰는 요청이 진행 중"""
+
+
+class UploadSessionManager:
+    """이어받기 가능한 분할 업로드 관리
+
+    세션 생성 → PATCH로 offset 지정 청크 전송 → finalize에서 크기/SHA-256/PDF 형식 검증.
+    임시 파일은 blob_store.tmp_dir(정적 마운트 밖)에 두고, 검증을 통과한 경우에만
+    원본 저장소로 넘긴다. 마지막 청크 이후 TTL이 지난 세션은 정리한다.
+    한 세션에는 한 번에 하나의 PATCH만 쓸 수 있다 (두 요청이 같은 임시 파일을
+    동시에 truncate/write하면 내용이 섞임).
+    """
+
+    def __init__(self):
+        self._writing: Set[str] = set()  # 청크를 쓰는 중인 세션 id
+
+    def is_busy(self, upload: models.UploadSession) -> bool:
+        return upload.id in self._writing
+
+    def create(
+        self,
+        db: Session,
+        user_id: str,
+        original_filename: str,
+        total_size: int,
+        folder_id: Optional[str] = None,
+        expected_sha256: Optional[str] = None
+    ) -> models.UploadSession:
+        if total_size <= 0 or total_size > MAX_UPLOAD_SIZE:
+            raise UploadIntegrityError("파일 크기는 500MB 이하여야 합니다")
+
+        temp_path = blob_store.new_temp_path()
+        open(temp_path, "wb").close()
+
+        upload = models.UploadSession(
+            user_id=user_id,
+            folder_id=folder_id,
+            original_filename=original_filename,
+            total_size=total_size,
+            received_size=0,
+            expected_sha256=expected_sha256.lower() if expected_sha256 else None,
+            temp_path=temp_path,
+            expires_at=datetime.utcnow() + UPLOAD_SESSION_TTL
+        )
+        db.add(upload)
+        return upload
+
+    async def append_chunk(
+        self,
+        db: Session,
+        upload: models.UploadSession,
+        offset: int,
+        body: AsyncIterator[bytes]
+    ) -> int:
+        """offset 위치부터 요청 본문을 이어 쓰고 새 offset 반환
+
+        연결이 중간에 끊겨도 실제로 기록된 바이트까지는 received_size에 반영되므로
+        클라이언트는 조회한 offset부터 다시 보내면 된다.
+        """
+        if self.is_busy(upload):
+            raise UploadBusyError()
+        if offset != upload.received_size:
+            raise UploadOffsetMismatchError(upload.received_size)
+
+        self._writing.add(upload.id)
+        written = 0
+        try:
+            with open(upload.temp_path, "r+b") as f:
+                # 이전 요청에서 기록만 되고 반영되지 않은 꼬리 부분 제거
+                f.seek(offset)
+                f.truncate()
+                async for chunk in body:
+                    if offset + written + len(chunk) > upload.total_size:
+                        raise UploadIntegrityError("선언한 파일 크기를 초과했습니다")
+                    f.write(chunk)
+                    written += len(chunk)
+        finally:
+            upload.received_size = offset + written
+            upload.expires_at = datetime.utcnow() + UPLOAD_SESSION_TTL
+            try:
+                db.commit()
+            finally:
+                self._writing.discard(upload.id)
+
+        return upload.received_size
+
+    def verify(self, upload: models.UploadSession, sha256: str) -> str:
+        """업로드 완료 검증 후 content_hash 반환
+
+        전체 파일을 읽어 해시하므로(최대 500MB) 이벤트 루프 밖(스레드풀)에서 호출한다.
+        """
+        if not sha256:
+            raise UploadIntegrityError("체크섬(SHA-256)이 필요합니다")
+        if upload.received_size != upload.total_size:
+            raise UploadIncompleteError(
+                f"업로드가 완료되지 않았습니다 ({upload.received_size}/{upload.total_size} bytes)"
+            )
+        if not os.path.exists(upload.temp_path) or os.path.getsize(upload.temp_path) != upload.total_size:
+            raise UploadIntegrityError("임시 파일 크기가 일치하지 않습니다")
+
+        digest = hashlib.sha256()
+        with open(upload.temp_path, "rb") as f:
+            if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                raise UploadIntegrityError("PDF 파일이 아닙니다")
+            f.seek(0)
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        for expected in (sha256, upload.expected_sha256):
+            if expected and expected.lower() != content_hash:
+                raise UploadIntegrityError("체크섬(SHA-256)이 일치하지 않습니다")
+        return content_hash
+
+    def discard(self, db: Session, upload: models.UploadSession) -> None:
+        """세션과 임시 파일 삭제 (커밋은 호출자가 수행)"""
+        blob_store.discard_temp(upload.temp_path)
+        db.delete(upload)
+
+    def cleanup_expired(self, db: Session) -> int:
+        """만료된(방치된) 세션 정리"""
+        expired = db.query(models.UploadSession).filter(
+            models.UploadSession.expires_at < datetime.utcnow()
+        ).all()
+        for upload in expired:
+            self.discard(db, upload)
+        db.commit()
+        if expired:
+            print(f"🧹 만료된 업로드 세션 {len(expired)}개 정리")
+        return len(expired)
+
+# 전역 인스턴스
+upload_session_manager = UploadSessionManager()